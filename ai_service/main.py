@@ -1,5 +1,6 @@
 import os
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from dotenv import load_dotenv
 from fastapi.middleware.cors import CORSMiddleware
 from api.v1 import api_v1_router
@@ -7,7 +8,8 @@ from api.v1 import api_v1_router
 # 加载.env环境变量，优先项目根目录
 load_dotenv()
 
-app = FastAPI()
+# 默认使用 orjson 序列化响应
+app = FastAPI(default_response_class=ORJSONResponse)
 
 origins = [
     "http://localhost",
@@ -0,0 +1,15 @@
+"""
+@Remark: ai 模块读多写少模型的读穿透缓存，随 AiConfig.ready 注册失效信号
+"""
+from ai.models import AIApiKey, AIModel
+from utils.model_cache import ModelCache
+from utils.models import CommonStatus
+
+ai_model_cache = ModelCache(
+    AIModel,
+    select_related=('key',),
+    depends_on=(AIApiKey,),
+    querysets={
+        'first_available': lambda qs: qs.filter(status=CommonStatus.ENABLED).select_related('key').order_by('pk')[:1],
+    },
+)
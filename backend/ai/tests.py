@@ -1,3 +1,72 @@
-from django.test import TestCase
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from ai.choices import PlatformChoices
+from ai.models import AIApiKey, AIModel
+from ai.utils import get_first_available_ai_config
+from ai.views.ai_api_key import AIApiKeySerializer
+from system.models import User
+from utils.models import CommonStatus
+
+
+class FirstAvailableAIConfigTests(TransactionTestCase):
+    """模型缓存在事务提交后失效，使用真实提交"""
+
+    def setUp(self):
+        cache.clear()
+        self.key = AIApiKey.objects.create(
+            name='默认', platform=PlatformChoices.OPENAI, api_key='sk-test', url='https://api.example.com',
+            status=CommonStatus.ENABLED,
+        )
+
+    def create_model(self, model, status=CommonStatus.ENABLED):
+        return AIModel.objects.create(
+            name=model, key=self.key, platform=PlatformChoices.OPENAI, model=model, status=status
+        )
+
+    def test_returns_first_enabled_model_and_follows_updates(self):
+        self.create_model('disabled', status=CommonStatus.DISABLED)
+        first = self.create_model('gpt-4o')
+        self.create_model('gpt-4o-mini')
+        get_config = async_to_sync(get_first_available_ai_config)
+        self.assertEqual(get_config(), ('gpt-4o', 'sk-test', 'https://api.example.com'))
+        # 缓存命中不再查询数据库
+        with self.assertNumQueries(0):
+            get_config()
+
+        first.status = CommonStatus.DISABLED
+        first.save()
+        self.key.api_key = 'sk-rotated'
+        self.key.save()
+        self.assertEqual(get_config(), ('gpt-4o-mini', 'sk-rotated', 'https://api.example.com'))
+
+    def test_raises_without_enabled_model(self):
+        self.create_model('disabled', status=CommonStatus.DISABLED)
+        with self.assertRaises(Exception):
+            async_to_sync(get_first_available_ai_config)()
+
+
+class AIApiKeyDesensitizationTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser(username='admin', password='admin123'))
+        for name, api_key in (('长密钥', 'sk-1234567890abcdef'), ('短密钥', 'sk-short')):
+            AIApiKey.objects.create(name=name, platform=PlatformChoices.OPENAI, api_key=api_key)
+
+    def test_compiled_masking_matches_per_row_masking(self):
+        data = self.client.get('/api/admin/ai/api_key/', {'ordering': 'id'}).json()['data']
+        self.assertEqual([item['api_key_desensitized'] for item in data], ['sk-1' + '*' * 11 + 'cdef', '*' * 8])
+        self.assertNotIn('api_key', data[0])
+
+        # 快速序列化、整列脱敏与逐条脱敏结果一致
+        queryset = AIApiKey.objects.order_by('id')
+        serializer = AIApiKeySerializer(queryset, many=True)
+        self.assertEqual([dict(item) for item in serializer.data], data)
+        child = serializer.child
+        self.assertEqual(
+            [item['api_key_desensitized'] for item in data],
+            [child._desensitize_field(obj, 'api_key') for obj in queryset],
+        )
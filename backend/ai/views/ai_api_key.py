@@ -26,6 +26,7 @@ class AIApiKeyViewSet(CustomModelViewSet):
     search_fields = ['name']  # 根据实际字段调整
     ordering_fields = ['create_time', 'id']
     ordering = ['-create_time']
+    use_values_serializer = True
 
 # 移入urls中
 #
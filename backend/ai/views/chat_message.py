@@ -2,6 +2,7 @@ from rest_framework import serializers
 
 from ai.models import ChatMessage
 from utils.serializers import CustomModelSerializer
+from utils.counting import CountStrategy
 from utils.custom_model_viewSet import CustomModelViewSet
 from django_filters import rest_framework as filters
 
@@ -35,4 +36,7 @@ class ChatMessageViewSet(CustomModelViewSet):
     search_fields = ['name']  # 根据实际字段调整
     ordering_fields = ['create_time', 'id']
     ordering = ['-create_time']
+    count_strategy = CountStrategy.ESTIMATE
+    stream_format = 'json'
+    use_values_serializer = True
 
@@ -169,11 +169,21 @@ REST_FRAMEWORK = {
         'utils.authentication.BearerTokenAuthentication',
         'rest_framework.authentication.BasicAuthentication',
         'rest_framework.authentication.SessionAuthentication',
-        'rest_framework.authentication.TokenAuthentication',
+        'utils.authentication.ExpiringTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
-    ]
+    ],
+    # orjson 渲染与解析
+    'DEFAULT_RENDERER_CLASSES': [
+        'utils.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'utils.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
 # ================= Redis 缓存配置 =================
@@ -187,6 +197,17 @@ CACHES = {
     }
 }
 
+# Token 有效期（秒），每次访问滑动续期
+TOKEN_EXPIRE_SECONDS = int(os.getenv('TOKEN_EXPIRE_SECONDS', 7 * 24 * 3600))
+
+# 离线 IP 归属地区间表（manage.py build_ip_location_table 生成）
+IP_LOCATION_DB = os.getenv('IP_LOCATION_DB', os.path.join(BASE_DIR, 'data', 'ip_location.dat'))
+
+# 登录日志保留月数（含当月，默认 0 为永久保留，需要时显式开启）、预建分区月数、过期分区是否归档（否则直接删除）
+LOGIN_LOG_RETENTION_MONTHS = int(os.getenv('LOGIN_LOG_RETENTION_MONTHS', 0))
+LOGIN_LOG_PARTITION_AHEAD = int(os.getenv('LOGIN_LOG_PARTITION_AHEAD', 3))
+LOGIN_LOG_ARCHIVE = os.getenv('LOGIN_LOG_ARCHIVE', 'False').lower() in ('true', '1')
+
 # SESSION 存 Redis
 SESSION_ENGINE = "django.contrib.sessions.backends.cache"
 SESSION_CACHE_ALIAS = "default"
@@ -206,6 +227,26 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'system.tasks.sync_temu_order',  # 任务路径
         'schedule': 60,  # 每1分钟执行一次
     },
+    'clear-expired-tokens': {
+        'task': 'system.tasks.clear_expired_tokens',
+        'schedule': 3600,  # 每小时清理一次过期 Token
+    },
+    'flush-login-logs': {
+        'task': 'system.tasks.flush_login_logs',
+        'schedule': 5,  # 每5秒批量写入一次登录日志
+    },
+    'resolve-login-locations': {
+        'task': 'system.tasks.resolve_login_locations',
+        'schedule': 60,  # 兜底补全未解析归属地的登录日志
+    },
+    'maintain-login-log-partitions': {
+        'task': 'system.tasks.maintain_login_log_partitions',
+        'schedule': 24 * 3600,  # 每天预建登录日志分区并清理过期数据
+    },
+    'rollup-login-logs': {
+        'task': 'system.tasks.rollup_login_logs',
+        'schedule': 60,  # 每分钟增量汇总登录统计
+    },
 }
 # celery 配置结束
 
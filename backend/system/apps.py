@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class SystemConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'system'
+
+    def ready(self):
+        import system.signals  # noqa: F401
+        import system.model_caches  # noqa: F401
@@ -0,0 +1,55 @@
+"""
+@Remark: 登录日志归属地延迟解析，登录时 location 留空，由 Celery 任务按批补全
+"""
+from django.db.models import Case, CharField, Value, When
+
+from system.models import LoginLog
+from utils.ip_location import get_ip_location
+
+# 每批解析的日志条数，以及单次任务最多处理的批数
+RESOLVE_BATCH_SIZE = 1000
+RESOLVE_MAX_BATCHES = 20
+
+
+def update_locations(rows):
+    """
+    rows 为 [(id, user_ip)]，同批 IP 去重后各查询一次，一条 CASE UPDATE 写回
+    返回更新条数
+    """
+    if not rows:
+        return 0
+    ids = [pk for pk, _ in rows]
+    locations = {ip: get_ip_location(ip) for ip in {ip for _, ip in rows}}
+    return LoginLog.objects.filter(pk__in=ids).update(
+        location=Case(
+            *[When(user_ip=ip, then=Value(location)) for ip, location in locations.items()],
+            default=Value(''),
+            output_field=CharField(),
+        )
+    )
+
+
+def resolve_pending_locations(batch_size=RESOLVE_BATCH_SIZE, max_batches=RESOLVE_MAX_BATCHES):
+    """补全 location 为空的日志，待解析的总是最新写入的记录，经 (location, id) 索引按 -id 取批次；返回更新条数"""
+    total = 0
+    for _ in range(max_batches):
+        rows = list(
+            LoginLog.objects.filter(location='').order_by('-id').values_list('id', 'user_ip')[:batch_size]
+        )
+        total += update_locations(rows)
+        if len(rows) < batch_size:
+            break
+    return total
+
+
+def iter_location_batches(queryset, batch_size=RESOLVE_BATCH_SIZE):
+    """按主键游标遍历 (id, user_ip) 批次，用于历史数据回填"""
+    last_id = 0
+    while True:
+        rows = list(
+            queryset.filter(pk__gt=last_id).order_by('id').values_list('id', 'user_ip')[:batch_size]
+        )
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1][0]
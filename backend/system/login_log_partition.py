@@ -0,0 +1,188 @@
+"""
+@Remark: 登录日志按月分区与过期归档
+
+MySQL：system_login_log 按 create_time 做 RANGE COLUMNS 月分区（分区名 pYYYYMM，另有兜底分区 pmax），
+带 create_time 条件的查询与 COUNT 由分区裁剪只访问涉及的月份；
+过期分区直接 DROP，开启归档时先 EXCHANGE 到独立的归档表 system_login_log_YYYYMM 再删除
+其他数据库或尚未分区时，按 create_time 分批删除过期记录
+"""
+import datetime
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, router, transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from system.models import LoginLog
+from utils.counting import estimate_cache_key, invalidate_count
+
+logger = logging.getLogger(__name__)
+
+MAX_PARTITION = 'pmax'
+# 非分区表过期清理每批删除条数
+PURGE_BATCH_SIZE = 10000
+
+
+def get_connection():
+    return connections[router.db_for_write(LoginLog)]
+
+
+def month_start(value):
+    return value.replace(day=1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def current_month():
+    return month_start(timezone.localdate())
+
+
+def partition_name(month):
+    return f'p{month:%Y%m}'
+
+
+def partition_month(name):
+    """pYYYYMM -> 月份，其他分区名返回 None"""
+    try:
+        return datetime.datetime.strptime(name, 'p%Y%m').date()
+    except ValueError:
+        return None
+
+
+def month_boundary(month, connection):
+    """本地时区的月初零点，换算为数据库中 create_time 的存储值"""
+    value = datetime.datetime.combine(month, datetime.time.min)
+    if settings.USE_TZ:
+        value = timezone.make_naive(timezone.make_aware(value), connection.timezone)
+    return value.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def partition_clause(month, connection):
+    return f"PARTITION {partition_name(month)} VALUES LESS THAN ('{month_boundary(add_months(month, 1), connection)}')"
+
+
+def get_partitions(connection):
+    """当前分区名列表（按顺序），未分区或非 MySQL 返回空列表"""
+    if connection.vendor != 'mysql':
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT PARTITION_NAME FROM information_schema.PARTITIONS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL "
+            "ORDER BY PARTITION_ORDINAL_POSITION",
+            [LoginLog._meta.db_table]
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def partition_table(ahead=None):
+    """
+    首次把登录日志表转换为月分区表（一次性操作，会重建整表）
+    分区键必须包含在主键中，主键改为 (id, create_time)；返回创建的月分区数
+    """
+    connection = get_connection()
+    if connection.vendor != 'mysql':
+        raise NotImplementedError('仅 MySQL 支持登录日志分区')
+    if get_partitions(connection):
+        return 0
+    ahead = settings.LOGIN_LOG_PARTITION_AHEAD if ahead is None else ahead
+    table = connection.ops.quote_name(LoginLog._meta.db_table)
+    first = LoginLog.objects.aggregate(first=Min('create_time'))['first']
+    start = month_start(timezone.localdate(first)) if first else current_month()
+    months = []
+    month = start
+    while month <= add_months(current_month(), ahead):
+        months.append(month)
+        month = add_months(month, 1)
+    clauses = [partition_clause(month, connection) for month in months]
+    clauses.append(f"PARTITION {MAX_PARTITION} VALUES LESS THAN (MAXVALUE)")
+    with connection.cursor() as cursor:
+        cursor.execute(f"UPDATE {table} SET create_time = COALESCE(update_time, NOW(6)) WHERE create_time IS NULL")
+        cursor.execute(
+            f"ALTER TABLE {table} MODIFY create_time datetime(6) NOT NULL COMMENT '创建时间', "
+            f"DROP PRIMARY KEY, ADD PRIMARY KEY (id, create_time)"
+        )
+        cursor.execute(f"ALTER TABLE {table} PARTITION BY RANGE COLUMNS(create_time) ({', '.join(clauses)})")
+    return len(months)
+
+
+def create_future_partitions(connection, partitions, ahead):
+    """从 pmax 中拆出到 当前月 + ahead 为止的月分区，返回新建的分区名"""
+    months = [month for month in map(partition_month, partitions) if month]
+    month = add_months(max(months), 1) if months else current_month()
+    created = []
+    while month <= add_months(current_month(), ahead):
+        created.append(month)
+        month = add_months(month, 1)
+    if not created:
+        return []
+    table = connection.ops.quote_name(LoginLog._meta.db_table)
+    clauses = [partition_clause(month, connection) for month in created]
+    clauses.append(f"PARTITION {MAX_PARTITION} VALUES LESS THAN (MAXVALUE)")
+    with connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {table} REORGANIZE PARTITION {MAX_PARTITION} INTO ({', '.join(clauses)})")
+    return [partition_name(month) for month in created]
+
+
+def expire_partitions(connection, partitions, cutoff, archive):
+    """删除早于 cutoff 月份的分区，archive 为 True 时先交换到归档表；返回处理的分区名"""
+    table = LoginLog._meta.db_table
+    qn = connection.ops.quote_name
+    expired = [name for name in partitions if partition_month(name) and partition_month(name) < cutoff]
+    with connection.cursor() as cursor:
+        for name in expired:
+            if archive:
+                archive_table = qn(f'{table}_{name[1:]}')
+                cursor.execute(f"CREATE TABLE {archive_table} LIKE {qn(table)}")
+                cursor.execute(f"ALTER TABLE {archive_table} REMOVE PARTITIONING")
+                cursor.execute(f"ALTER TABLE {qn(table)} EXCHANGE PARTITION {name} WITH TABLE {archive_table}")
+            cursor.execute(f"ALTER TABLE {qn(table)} DROP PARTITION {name}")
+    return expired
+
+
+def purge_expired_rows(cutoff, batch_size=PURGE_BATCH_SIZE):
+    """未分区时按批删除 create_time 早于 cutoff 的记录，返回删除条数"""
+    boundary = timezone.make_aware(datetime.datetime.combine(cutoff, datetime.time.min))
+    queryset = LoginLog.objects.filter(create_time__lt=boundary)
+    total = 0
+    while True:
+        with transaction.atomic():
+            ids = list(queryset.order_by('id').values_list('id', flat=True)[:batch_size])
+            if ids:
+                total += LoginLog.objects.filter(pk__in=ids).delete()[0]
+        if len(ids) < batch_size:
+            return total
+
+
+def maintain_partitions(retention=None, ahead=None, archive=None):
+    """
+    分区维护：预建未来分区，按保留月数删除或归档过期数据（retention 为 0 时永久保留）
+    返回 {'created': [...], 'expired': [...], 'purged': n}
+    """
+    retention = settings.LOGIN_LOG_RETENTION_MONTHS if retention is None else retention
+    ahead = settings.LOGIN_LOG_PARTITION_AHEAD if ahead is None else ahead
+    archive = settings.LOGIN_LOG_ARCHIVE if archive is None else archive
+    # 保留最近 retention 个月（含当月）
+    cutoff = add_months(current_month(), 1 - retention) if retention > 0 else None
+
+    connection = get_connection()
+    partitions = get_partitions(connection)
+    result = {'created': [], 'expired': [], 'purged': 0}
+    if partitions:
+        result['created'] = create_future_partitions(connection, partitions, ahead)
+        if cutoff:
+            result['expired'] = expire_partitions(connection, partitions, cutoff, archive)
+    elif cutoff:
+        if archive:
+            logger.warning("登录日志表未分区，不支持归档，过期记录将直接删除")
+        result['purged'] = purge_expired_rows(cutoff)
+
+    if result['expired'] or result['purged']:
+        invalidate_count(LoginLog)
+        cache.delete(estimate_cache_key(LoginLog))
+    return result
@@ -0,0 +1,189 @@
+"""
+@Remark: 登录统计预聚合，按 LoginLog.id 高水位增量汇总到 LoginLogStat，看板只读汇总表
+"""
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from system.models import LoginLog, LoginLogStat, LoginLogStatCheckpoint
+
+ROLLUP_NAME = 'login_log_stat'
+# 每批汇总的日志条数，以及单次任务最多处理的批数
+ROLLUP_BATCH_SIZE = 10000
+ROLLUP_MAX_BATCHES = 50
+# 只汇总写入（update_time）超过该秒数的日志，避免并发事务中较小的 id 晚提交而被高水位跳过；
+# create_time 为登录发生时间，可能早于落库时间，不能用于判断
+SETTLE_SECONDS = 60
+# 归属地尚未解析的日志最多等待的秒数，超时按空归属地汇总
+LOCATION_WAIT_SECONDS = 600
+# 看板单次查询的最大时段数
+MAX_SERIES_POINTS = 1000
+
+Period = LoginLogStat.Period
+Dimension = LoginLogStat.Dimension
+
+
+def get_buckets(create_time):
+    """本地时区的 (天, 小时) 时段起点"""
+    hour = timezone.localtime(create_time).replace(minute=0, second=0, microsecond=0)
+    return hour.replace(hour=0), hour
+
+
+def settled_rows(rows):
+    """截取可以汇总的前缀：遇到刚写入、或归属地仍在等待解析的日志即停止"""
+    now = timezone.now()
+    settle_before = now - timedelta(seconds=SETTLE_SECONDS)
+    location_before = now - timedelta(seconds=LOCATION_WAIT_SECONDS)
+    for index, (_, create_time, _, location, _, update_time) in enumerate(rows):
+        written = update_time or create_time
+        if written >= settle_before or (not location and written >= location_before):
+            return rows[:index]
+    return rows
+
+
+def aggregate_rows(rows):
+    """rows 为 (id, create_time, result, location, username, update_time)，返回 {(dimension, period, bucket, value): [total, failed]}"""
+    stats = defaultdict(lambda: [0, 0])
+    for _, create_time, result, location, username, _ in rows:
+        failed = int(result == LoginLog.LoginResult.FAILED)
+        day, hour = get_buckets(create_time)
+        for dimension, value in (
+            (Dimension.RESULT, str(result)),
+            (Dimension.LOCATION, location or ''),
+            (Dimension.USERNAME, username or ''),
+        ):
+            for period, bucket in ((Period.DAY, day), (Period.HOUR, hour)):
+                item = stats[(dimension, period, bucket, value)]
+                item[0] += 1
+                item[1] += failed
+    return stats
+
+
+def apply_stats(stats):
+    """把增量累加到汇总表：一次查询取出已有行，bulk_update 已有行，bulk_create 新行"""
+    keys = defaultdict(lambda: (set(), set()))
+    for dimension, period, bucket, value in stats:
+        buckets, values = keys[(dimension, period)]
+        buckets.add(bucket)
+        values.add(value)
+    condition = Q()
+    for (dimension, period), (buckets, values) in keys.items():
+        condition |= Q(dimension=dimension, period=period, bucket__in=buckets, value__in=values)
+    existing = {
+        (stat.dimension, stat.period, stat.bucket, stat.value): stat
+        for stat in LoginLogStat.objects.filter(condition)
+    }
+    updated, created = [], []
+    for key, (total, failed) in stats.items():
+        stat = existing.get(key)
+        if stat is None:
+            dimension, period, bucket, value = key
+            created.append(LoginLogStat(
+                dimension=dimension, period=period, bucket=bucket, value=value, total=total, failed=failed
+            ))
+        else:
+            stat.total += total
+            stat.failed += failed
+            updated.append(stat)
+    LoginLogStat.objects.bulk_update(updated, ['total', 'failed'], batch_size=1000)
+    LoginLogStat.objects.bulk_create(created, batch_size=1000)
+
+
+def rollup_login_logs(batch_size=ROLLUP_BATCH_SIZE, max_batches=ROLLUP_MAX_BATCHES):
+    """从高水位之后的日志增量汇总，返回汇总条数；高水位行加锁，多个任务并发时串行执行"""
+    total = 0
+    for _ in range(max_batches):
+        with transaction.atomic():
+            checkpoint, _ = LoginLogStatCheckpoint.objects.select_for_update().get_or_create(name=ROLLUP_NAME)
+            rows = list(
+                LoginLog.objects.filter(pk__gt=checkpoint.last_id).order_by('id')
+                .values_list('id', 'create_time', 'result', 'location', 'username', 'update_time')[:batch_size]
+            )
+            fetched = len(rows)
+            rows = settled_rows(rows)
+            if rows:
+                apply_stats(aggregate_rows(rows))
+                checkpoint.last_id = rows[-1][0]
+                checkpoint.save(update_fields=['last_id', 'update_time'])
+        total += len(rows)
+        if fetched < batch_size or len(rows) < fetched:
+            break
+    return total
+
+
+def to_bucket_start(value, period):
+    """日期或日期时间对齐到时段起点（本地时区）"""
+    if not isinstance(value, datetime):
+        value = datetime.combine(value, time.min)
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    value = timezone.localtime(value).replace(minute=0, second=0, microsecond=0)
+    return value.replace(hour=0) if period == Period.DAY else value
+
+
+def resolve_range(period, start=None, end=None):
+    """
+    对齐统计区间的起止时段，缺省时按天为最近 30 天、按小时为最近 24 小时
+    返回 (start, end, 时段数)
+    """
+    step = timedelta(days=1) if period == Period.DAY else timedelta(hours=1)
+    end = to_bucket_start(end or timezone.localtime(), period)
+    start = to_bucket_start(start, period) if start else end - step * (29 if period == Period.DAY else 23)
+    points = int((timezone.make_naive(end) - timezone.make_naive(start)) / step) + 1
+    return start, end, points
+
+
+def _sum_by(queryset, field):
+    return queryset.values(field).annotate(sum_total=Sum('total'), sum_failed=Sum('failed')).order_by()
+
+
+def get_login_analytics(period=Period.DAY, dimension=Dimension.RESULT, start=None, end=None, top=10):
+    """
+    读取汇总表：
+    summary 为区间总量与失败率，series 为逐时段的登录/失败次数，
+    top 为所选维度按登录次数排名的取值（dimension=result 时为各登录结果）
+    """
+    start, end, _ = resolve_range(period, start, end)
+    queryset = LoginLogStat.objects.filter(period=period, bucket__gte=start, bucket__lte=end)
+
+    step = timedelta(days=1) if period == Period.DAY else timedelta(hours=1)
+    time_format = '%Y-%m-%d' if period == Period.DAY else '%Y-%m-%d %H:00'
+    counts = {
+        row['bucket']: (row['sum_total'], row['sum_failed'])
+        for row in _sum_by(queryset.filter(dimension=Dimension.RESULT), 'bucket')
+    }
+    series = []
+    bucket = start
+    while bucket <= end:
+        total, failed = counts.get(bucket, (0, 0))
+        series.append({'time': bucket.strftime(time_format), 'total': total, 'failed': failed})
+        # 按本地时间步进，跨夏令时的时区也能对齐时段
+        bucket = timezone.make_aware(timezone.make_naive(bucket) + step)
+
+    top_values = [
+        {'value': row['value'], 'total': row['sum_total'], 'failed': row['sum_failed']}
+        for row in _sum_by(queryset.filter(dimension=dimension), 'value').order_by('-sum_total', 'value')[:top]
+    ]
+    if dimension == Dimension.RESULT:
+        labels = dict(LoginLog.LoginResult.choices)
+        for item in top_values:
+            item['label'] = labels.get(int(item['value']), item['value'])
+
+    total = sum(item['total'] for item in series)
+    failed = sum(item['failed'] for item in series)
+    return {
+        'period': period,
+        'dimension': dimension,
+        'start': start.strftime(time_format),
+        'end': end.strftime(time_format),
+        'summary': {
+            'total': total,
+            'failed': failed,
+            'failure_rate': round(failed / total, 4) if total else 0,
+        },
+        'series': series,
+        'top': top_values,
+    }
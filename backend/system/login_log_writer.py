@@ -0,0 +1,180 @@
+"""
+@Remark: 登录日志缓冲写入，登录请求只把事件推入 Redis 队列，由 Celery 定时批量落库
+"""
+import json
+import logging
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, DateTimeField, GenericIPAddressField, Value, When
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from redis.exceptions import RedisError
+
+from system.models import LoginLog, User
+from utils.authentication import user_cache_key
+
+logger = logging.getLogger(__name__)
+
+# 登录事件队列（Redis List）
+LOGIN_LOG_QUEUE_KEY = 'login_log:queue'
+# 多次落库失败的事件移入死信队列，排查后可用 requeue_dead_login_logs 放回
+LOGIN_LOG_DEAD_KEY = 'login_log:dead'
+# 每批落库的事件数，以及单次任务最多处理的批数
+FLUSH_BATCH_SIZE = 1000
+FLUSH_MAX_BATCHES = 50
+# 单个事件最多落库失败的次数（每 5 秒重试一次），超过后移入死信队列
+FLUSH_MAX_ATTEMPTS = 60
+
+
+def get_redis():
+    from django_redis import get_redis_connection
+    return get_redis_connection('default')
+
+
+def record_login(user, user_ip, user_agent, result=LoginLog.LoginResult.SUCCESS, location=''):
+    """
+    记录一次登录：事件推入 Redis 队列，登录日志与用户的 login_ip/last_login 由 flush_login_logs 批量写入
+    location 通常留空，落库后由 resolve_login_locations 任务补全；Redis 不可用时同步写库
+    """
+    event = {
+        'user_id': user.pk,
+        'username': user.username,
+        'result': int(result),
+        'user_ip': user_ip,
+        'user_agent': (user_agent or '')[:512],
+        'location': location or '',
+        'time': timezone.now().isoformat(),
+    }
+    try:
+        get_redis().rpush(LOGIN_LOG_QUEUE_KEY, json.dumps(event))
+    except (RedisError, NotImplementedError) as e:
+        logger.warning(f"登录日志入队失败，改为同步写入: {e}")
+        write_login_events([event])
+
+
+def flush_login_logs(batch_size=FLUSH_BATCH_SIZE, max_batches=FLUSH_MAX_BATCHES):
+    """从队列取出事件批量落库，返回写入条数；落库失败时事件放回队首等待下次重试"""
+    conn = get_redis()
+    total = 0
+    for _ in range(max_batches):
+        with conn.pipeline() as pipe:
+            pipe.lrange(LOGIN_LOG_QUEUE_KEY, 0, batch_size - 1)
+            pipe.ltrim(LOGIN_LOG_QUEUE_KEY, batch_size, -1)
+            items, _ = pipe.execute()
+        if not items:
+            break
+        try:
+            write_login_events([json.loads(item) for item in items])
+        except Exception as e:
+            requeue_failed_events(conn, items, e)
+            raise
+        total += len(items)
+        if len(items) < batch_size:
+            break
+    return total
+
+
+def requeue_failed_events(conn, items, error):
+    """失败批次的事件累加失败次数后放回队首，达到 FLUSH_MAX_ATTEMPTS 或无法解析的移入死信队列"""
+    retry, dead = [], []
+    for item in items:
+        try:
+            event = json.loads(item)
+        except ValueError:
+            dead.append(item)
+            continue
+        event['attempts'] = event.get('attempts', 0) + 1
+        if event['attempts'] >= FLUSH_MAX_ATTEMPTS:
+            event['error'] = str(error)[:500]
+            dead.append(json.dumps(event))
+        else:
+            retry.append(json.dumps(event))
+    with conn.pipeline() as pipe:
+        if retry:
+            pipe.lpush(LOGIN_LOG_QUEUE_KEY, *reversed(retry))
+        if dead:
+            pipe.rpush(LOGIN_LOG_DEAD_KEY, *dead)
+        pipe.execute()
+    if dead:
+        logger.error(f"{len(dead)} 条登录事件多次落库失败，已移入死信队列 {LOGIN_LOG_DEAD_KEY}: {error}")
+
+
+def requeue_dead_login_logs():
+    """把死信队列中的事件重置失败次数后放回队尾，返回放回条数；无法解析的事件留在死信队列"""
+    conn = get_redis()
+    with conn.pipeline() as pipe:
+        pipe.lrange(LOGIN_LOG_DEAD_KEY, 0, -1)
+        pipe.delete(LOGIN_LOG_DEAD_KEY)
+        items, _ = pipe.execute()
+    events, broken = [], []
+    for item in items:
+        try:
+            event = json.loads(item)
+        except ValueError:
+            broken.append(item)
+            continue
+        event.pop('attempts', None)
+        event.pop('error', None)
+        events.append(json.dumps(event))
+    with conn.pipeline() as pipe:
+        if events:
+            pipe.rpush(LOGIN_LOG_QUEUE_KEY, *events)
+        if broken:
+            pipe.rpush(LOGIN_LOG_DEAD_KEY, *broken)
+        pipe.execute()
+    return len(events)
+
+
+def write_login_events(events):
+    """一次 bulk_create 写入登录日志，一条 CASE UPDATE 更新用户最近登录信息"""
+    with transaction.atomic():
+        LoginLog.objects.bulk_create([
+            LoginLog(
+                username=event['username'],
+                result=event['result'],
+                user_ip=event['user_ip'],
+                user_agent=event['user_agent'],
+                location=event.get('location', ''),
+                create_time=parse_datetime(event['time']),
+            )
+            for event in events
+        ], batch_size=FLUSH_BATCH_SIZE)
+        # 登录日志只追加，列表总数缓存按 COUNT_CACHE_TIMEOUT 自然过期，不在每次落库时失效
+        update_last_login(events)
+        if any(not event.get('location') for event in events):
+            transaction.on_commit(enqueue_resolve_locations)
+
+
+def enqueue_resolve_locations():
+    """投递归属地解析任务，投递失败时由定时任务兜底"""
+    from system.tasks import resolve_login_locations
+    try:
+        resolve_login_locations.delay()
+    except Exception as e:
+        logger.warning(f"归属地解析任务投递失败: {e}")
+
+
+def update_last_login(events):
+    """按用户取最近一次成功登录，集合式更新 login_ip、last_login"""
+    latest = {}
+    for event in events:
+        if event.get('user_id') is None or event['result'] != LoginLog.LoginResult.SUCCESS:
+            continue
+        login_time = parse_datetime(event['time'])
+        if event['user_id'] not in latest or latest[event['user_id']][0] < login_time:
+            latest[event['user_id']] = (login_time, event['user_ip'] or None)
+    if not latest:
+        return
+    User.objects.filter(pk__in=latest).update(
+        last_login=Case(
+            *[When(pk=user_id, then=Value(login_time)) for user_id, (login_time, _) in latest.items()],
+            output_field=DateTimeField(),
+        ),
+        login_ip=Case(
+            *[When(pk=user_id, then=Value(ip)) for user_id, (_, ip) in latest.items()],
+            output_field=GenericIPAddressField(),
+        ),
+    )
+    # QuerySet.update 不触发 post_save，手动清理 Token 认证的用户快照
+    transaction.on_commit(lambda: cache.delete_many([user_cache_key(user_id) for user_id in latest]))
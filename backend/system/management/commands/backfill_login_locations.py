@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from system.login_location import RESOLVE_BATCH_SIZE, iter_location_batches, update_locations
+from system.models import LoginLog
+
+
+class Command(BaseCommand):
+    help = '回填登录日志的 IP 归属地（默认只处理 location 为空的记录，--all 重新解析全部记录）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='重新解析全部记录（IP 区间表更新后使用）')
+        parser.add_argument('--batch-size', type=int, default=RESOLVE_BATCH_SIZE, help='每批处理条数')
+
+    def handle(self, *args, **options):
+        queryset = LoginLog.objects.all()
+        if not options['all']:
+            queryset = queryset.filter(location='')
+        total = 0
+        for rows in iter_location_batches(queryset, options['batch_size']):
+            total += update_locations(rows)
+            self.stdout.write(f"已处理至 ID {rows[-1][0]}，累计更新 {total} 条")
+        self.stdout.write(self.style.SUCCESS(f"登录日志归属地回填完成，共更新 {total} 条"))
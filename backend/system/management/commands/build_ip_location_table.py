@@ -0,0 +1,54 @@
+import csv
+import ipaddress
+
+from django.core.management.base import BaseCommand, CommandError
+
+from utils.ip_location import get_table_path, write_table
+
+
+def parse_ipv4(value):
+    """起止地址支持点分十进制或整数"""
+    value = value.strip()
+    if value.isdigit():
+        return int(value)
+    return int(ipaddress.IPv4Address(value))
+
+
+class Command(BaseCommand):
+    help = '从 CSV 生成离线 IP 归属地区间表，每行格式：起始IP,结束IP,地名列...（如 国家,省份,城市）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_file', help='IP 区间 CSV 文件路径')
+        parser.add_argument('--output', default=None, help='输出文件路径，默认 settings.IP_LOCATION_DB')
+        parser.add_argument('--encoding', default='utf-8-sig', help='CSV 文件编码')
+        parser.add_argument('--reverse', action='store_true', help='地名列按从小到大排列时（如 国家,省份,城市）倒序拼接为 城市, 省份, 国家')
+
+    def handle(self, *args, **options):
+        output = options['output'] or get_table_path()
+        ranges, skipped = [], 0
+        try:
+            with open(options['csv_file'], newline='', encoding=options['encoding']) as f:
+                for row in csv.reader(f):
+                    if len(row) < 3:
+                        skipped += 1
+                        continue
+                    try:
+                        start, end = parse_ipv4(row[0]), parse_ipv4(row[1])
+                    except ValueError:
+                        # 表头或 IPv6 区间
+                        skipped += 1
+                        continue
+                    parts = [part.strip() for part in row[2:] if part.strip() and part.strip() != '0']
+                    if options['reverse']:
+                        parts.reverse()
+                    if start > end or not parts:
+                        skipped += 1
+                        continue
+                    ranges.append((start, end, ', '.join(dict.fromkeys(parts))))
+        except OSError as e:
+            raise CommandError(f"读取 CSV 失败: {e}")
+
+        count = write_table(ranges, output)
+        self.stdout.write(self.style.SUCCESS(
+            f"IP 区间表已生成：{output}，共 {count} 个区间，跳过 {skipped} 行；运行中的服务重启后生效"
+        ))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from system.login_log_partition import get_connection, get_partitions, maintain_partitions, partition_table
+
+
+class Command(BaseCommand):
+    help = '登录日志按月分区维护：--init 首次转换为分区表（仅 MySQL），之后预建未来分区并按保留月数归档或删除过期数据'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--init', action='store_true', help='把现有登录日志表转换为月分区表（重建整表，请在低峰期执行）')
+        parser.add_argument('--retention', type=int, default=None, help='保留月数（含当月），0 为永久保留，默认 settings.LOGIN_LOG_RETENTION_MONTHS')
+        parser.add_argument('--ahead', type=int, default=None, help='预建未来分区的月数，默认 settings.LOGIN_LOG_PARTITION_AHEAD')
+        parser.add_argument('--archive', action='store_true', default=None, help='过期分区交换到归档表后再删除')
+        parser.add_argument('--list', action='store_true', help='只列出当前分区')
+
+    def handle(self, *args, **options):
+        if options['list']:
+            partitions = get_partitions(get_connection())
+            self.stdout.write(', '.join(partitions) if partitions else '登录日志表未分区')
+            return
+        if options['init']:
+            try:
+                count = partition_table(options['ahead'])
+            except NotImplementedError as e:
+                raise CommandError(str(e))
+            self.stdout.write(self.style.SUCCESS(
+                f"登录日志表已转换为月分区表，共 {count} 个月分区" if count else "登录日志表已是分区表，跳过转换"
+            ))
+        result = maintain_partitions(options['retention'], options['ahead'], options['archive'])
+        self.stdout.write(self.style.SUCCESS(
+            f"新建分区 {len(result['created'])} 个，"
+            f"归档/删除过期分区 {len(result['expired'])} 个，"
+            f"删除过期记录 {result['purged']} 条"
+        ))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from system.models import DeptClosure
+
+
+class Command(BaseCommand):
+    help = '根据 Dept.pid 全量重建部门闭包表（批量导入或 queryset.update 修改上级部门后执行）'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            count = DeptClosure.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"部门闭包表已重建，共 {count} 条记录"))
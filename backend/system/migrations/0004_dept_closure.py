@@ -0,0 +1,87 @@
+# Generated by Django 5.2.1 on 2026-10-18 19:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_dept_closure(apps, schema_editor):
+    Dept = apps.get_model("system", "Dept")
+    DeptClosure = apps.get_model("system", "DeptClosure")
+    parents = dict(Dept.objects.values_list("id", "pid_id"))
+    links = []
+    for dept_id in parents:
+        depth, current, seen = 0, dept_id, set()
+        while current is not None and current in parents and current not in seen:
+            seen.add(current)
+            links.append(
+                DeptClosure(ancestor_id=current, descendant_id=dept_id, depth=depth)
+            )
+            current = parents[current]
+            depth += 1
+    DeptClosure.objects.bulk_create(links, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("system", "0003_loginlog_location"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DeptClosure",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "depth",
+                    models.IntegerField(
+                        db_comment="层级距离", default=0, verbose_name="层级距离"
+                    ),
+                ),
+                (
+                    "ancestor",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="descendant_links",
+                        to="system.dept",
+                        verbose_name="祖先部门",
+                    ),
+                ),
+                (
+                    "descendant",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="ancestor_links",
+                        to="system.dept",
+                        verbose_name="子孙部门",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "部门闭包表",
+                "verbose_name_plural": "部门闭包表",
+                "db_table": "system_dept_closure",
+                "indexes": [
+                    models.Index(
+                        fields=["descendant", "depth"], name="idx_dept_closure_desc"
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("ancestor", "descendant"), name="uniq_dept_closure"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(build_dept_closure, migrations.RunPython.noop),
+    ]
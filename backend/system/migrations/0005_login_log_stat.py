@@ -0,0 +1,96 @@
+# Generated by Django 5.2.1 on 2026-10-18 19:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("system", "0004_dept_closure"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LoginLogStatCheckpoint",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "name",
+                    models.CharField(db_comment="汇总名称", max_length=50, unique=True),
+                ),
+                (
+                    "last_id",
+                    models.BigIntegerField(db_comment="已汇总的最大日志 ID", default=0),
+                ),
+                (
+                    "update_time",
+                    models.DateTimeField(auto_now=True, db_comment="更新时间"),
+                ),
+            ],
+            options={
+                "verbose_name": "登录统计高水位",
+                "verbose_name_plural": "登录统计高水位",
+                "db_table": "system_login_log_stat_checkpoint",
+            },
+        ),
+        migrations.CreateModel(
+            name="LoginLogStat",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "period",
+                    models.CharField(
+                        choices=[("day", "天"), ("hour", "小时")],
+                        db_comment="统计粒度",
+                        max_length=8,
+                    ),
+                ),
+                ("bucket", models.DateTimeField(db_comment="统计时段起点")),
+                (
+                    "dimension",
+                    models.CharField(
+                        choices=[
+                            ("result", "登录结果"),
+                            ("location", "归属地"),
+                            ("username", "用户名"),
+                        ],
+                        db_comment="统计维度",
+                        max_length=16,
+                    ),
+                ),
+                (
+                    "value",
+                    models.CharField(db_comment="维度取值", default="", max_length=200),
+                ),
+                ("total", models.IntegerField(db_comment="登录次数", default=0)),
+                ("failed", models.IntegerField(db_comment="失败次数", default=0)),
+            ],
+            options={
+                "verbose_name": "登录统计汇总",
+                "verbose_name_plural": "登录统计汇总",
+                "db_table": "system_login_log_stat",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("dimension", "period", "bucket", "value"),
+                        name="uniq_login_log_stat",
+                    )
+                ],
+            },
+        ),
+    ]
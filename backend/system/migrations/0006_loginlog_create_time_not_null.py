@@ -0,0 +1,33 @@
+# Generated by Django 5.2.1 on 2026-10-18 21:10
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models.functions import Coalesce, Now
+
+
+def fill_create_time(apps, schema_editor):
+    LoginLog = apps.get_model("system", "LoginLog")
+    LoginLog.objects.filter(create_time__isnull=True).update(
+        create_time=Coalesce("update_time", Now())
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("system", "0005_login_log_stat"),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_create_time, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="loginlog",
+            name="create_time",
+            field=models.DateTimeField(
+                db_comment="创建时间",
+                default=django.utils.timezone.now,
+                help_text="创建时间",
+                verbose_name="创建时间",
+            ),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.1 on 2026-10-18 22:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("system", "0006_loginlog_create_time_not_null"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="loginlog",
+            index=models.Index(fields=["location", "id"], name="idx_login_log_location"),
+        ),
+    ]
@@ -0,0 +1,42 @@
+"""
+@Remark: system 模块的共享缓存：读多写少模型的读穿透缓存（随 SystemConfig.ready 注册失效信号），
+以及由 system.signals 失效的派生结果缓存；放在视图之外，信号模块不需要导入视图
+"""
+from system.models import Dept, DictData, DictType, Menu, MenuMeta, Role
+from utils.cache import VersionedCache
+from utils.model_cache import ModelCache
+from utils.models import CommonStatus
+
+menu_cache = ModelCache(
+    Menu,
+    select_related=('meta',),
+    depends_on=(MenuMeta,),
+    querysets={
+        'button_auth_codes': lambda qs: qs.filter(type='button').order_by('auth_code')
+        .values_list('auth_code', flat=True).distinct(),
+    },
+)
+
+role_cache = ModelCache(Role)
+
+dept_cache = ModelCache(
+    Dept,
+    querysets={
+        'tree': lambda qs: qs.order_by('sort', 'id'),
+    },
+)
+
+dict_data_cache = ModelCache(
+    DictData,
+    select_related=('dict_type',),
+    depends_on=(DictType,),
+    querysets={
+        'enabled': lambda qs: qs.filter(is_deleted=False, status=CommonStatus.ENABLED).select_related('dict_type'),
+    },
+)
+
+# 按角色集合物化的用户菜单树，Menu/MenuMeta/Role/RolePermission 变更时由 system.signals 失效
+user_menu_cache = VersionedCache('user_menu', timeout=3600, local_timeout=60)
+
+# 全部启用字典按类型分组的快照，DictType/DictData 变更时由 system.signals 失效
+dict_bundle_cache = VersionedCache('dict_bundle', timeout=3600, local_timeout=60)
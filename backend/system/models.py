@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils import timezone
 
 from backend import settings
 from utils.models import CoreModel, CommonStatus
@@ -88,6 +89,95 @@ class Dept(CoreModel):
         verbose_name_plural = verbose_name
         ordering = ["-create_time"]  # 按创建时间倒序排列
 
+    def get_descendant_ids(self, include_self=True):
+        """本部门及所有子孙部门 id 的子查询"""
+        return DeptClosure.descendant_ids([self.pk], include_self=include_self)
+
+
+class DeptClosure(models.Model):
+    """
+    部门闭包表：记录每个部门与其所有祖先（含自身）的关系
+    由 system.signals 在部门新增、移动时维护，删除时随外键级联清理
+    """
+    ancestor = models.ForeignKey(
+        Dept,
+        on_delete=models.CASCADE,
+        related_name='descendant_links',
+        db_constraint=False,
+        verbose_name='祖先部门'
+    )
+    descendant = models.ForeignKey(
+        Dept,
+        on_delete=models.CASCADE,
+        related_name='ancestor_links',
+        db_constraint=False,
+        verbose_name='子孙部门'
+    )
+    depth = models.IntegerField(default=0, db_comment='层级距离', verbose_name='层级距离')
+
+    class Meta:
+        db_table = 'system_dept_closure'
+        verbose_name = '部门闭包表'
+        verbose_name_plural = verbose_name
+        constraints = [
+            models.UniqueConstraint(fields=['ancestor', 'descendant'], name='uniq_dept_closure'),
+        ]
+        indexes = [
+            models.Index(fields=['descendant', 'depth'], name='idx_dept_closure_desc'),
+        ]
+
+    @classmethod
+    def descendant_ids(cls, dept_ids, include_self=True):
+        """指定部门及其子孙部门 id 的子查询，可直接用于 xxx__in"""
+        queryset = cls.objects.filter(ancestor_id__in=dept_ids)
+        if not include_self:
+            queryset = queryset.filter(depth__gt=0)
+        return queryset.values('descendant_id')
+
+    @classmethod
+    def insert_node(cls, dept):
+        """新增部门：复制父部门的祖先链并加上自身"""
+        links = [cls(ancestor_id=dept.pk, descendant_id=dept.pk, depth=0)]
+        if dept.pid_id:
+            links.extend(
+                cls(ancestor_id=ancestor_id, descendant_id=dept.pk, depth=depth + 1)
+                for ancestor_id, depth in cls.objects.filter(
+                    descendant_id=dept.pid_id
+                ).values_list('ancestor_id', 'depth')
+            )
+        cls.objects.bulk_create(links, ignore_conflicts=True)
+
+    @classmethod
+    def move_subtree(cls, dept):
+        """移动子树：断开子树与旧祖先的关系，再与新父部门的祖先链做笛卡尔积"""
+        subtree = list(cls.objects.filter(ancestor_id=dept.pk).values_list('descendant_id', 'depth'))
+        subtree_ids = [descendant_id for descendant_id, _ in subtree]
+        cls.objects.filter(descendant_id__in=subtree_ids).exclude(ancestor_id__in=subtree_ids).delete()
+        if not dept.pid_id:
+            return
+        ancestors = list(cls.objects.filter(descendant_id=dept.pid_id).values_list('ancestor_id', 'depth'))
+        cls.objects.bulk_create([
+            cls(ancestor_id=ancestor_id, descendant_id=descendant_id, depth=up + down + 1)
+            for ancestor_id, up in ancestors
+            for descendant_id, down in subtree
+        ], batch_size=1000)
+
+    @classmethod
+    def rebuild(cls):
+        """根据 Dept.pid 全量重建闭包表"""
+        parents = dict(Dept.objects.values_list('id', 'pid_id'))
+        links = []
+        for dept_id in parents:
+            depth, current, seen = 0, dept_id, set()
+            while current is not None and current in parents and current not in seen:
+                seen.add(current)
+                links.append(cls(ancestor_id=current, descendant_id=dept_id, depth=depth))
+                current = parents[current]
+                depth += 1
+        cls.objects.all().delete()
+        cls.objects.bulk_create(links, batch_size=1000)
+        return len(links)
+
 # 主菜单模型
 class Menu(CoreModel):
     pid = models.ForeignKey(
@@ -297,12 +387,61 @@ class LoginLog(CoreModel):
     user_ip = models.CharField(max_length=50, db_comment='用户 IP')
     user_agent = models.CharField(max_length=512, db_comment='浏览器 UA')
     location = models.CharField(max_length=200, db_comment='<IP> 地理位置', blank=True, default='')
+    # 月分区的分区键，不允许为空（见 system.login_log_partition）；批量落库时取登录发生的时间
+    create_time = models.DateTimeField(default=timezone.now, help_text="创建时间", db_comment="创建时间",
+                                       verbose_name="创建时间")
 
     class Meta:
         db_table = 'system_login_log'
         verbose_name = '系统访问记录'
         verbose_name_plural = verbose_name
         ordering = ['-id']
+        indexes = [
+            # 归属地待解析的记录按 -id 取批次（system.login_location）
+            models.Index(fields=['location', 'id'], name='idx_login_log_location'),
+        ]
 
     def __str__(self):
         return f"{self.username} - {self.user_ip}"
+
+
+class LoginLogStat(models.Model):
+    """
+    登录统计汇总：按 天/小时 × 登录结果/归属地/用户名 预聚合
+    由 system.login_log_rollup 按 LoginLog.id 高水位增量维护
+    """
+    class Period(models.TextChoices):
+        DAY = 'day', '天'
+        HOUR = 'hour', '小时'
+
+    class Dimension(models.TextChoices):
+        RESULT = 'result', '登录结果'
+        LOCATION = 'location', '归属地'
+        USERNAME = 'username', '用户名'
+
+    period = models.CharField(max_length=8, choices=Period.choices, db_comment='统计粒度')
+    bucket = models.DateTimeField(db_comment='统计时段起点')
+    dimension = models.CharField(max_length=16, choices=Dimension.choices, db_comment='统计维度')
+    value = models.CharField(max_length=200, default='', db_comment='维度取值')
+    total = models.IntegerField(default=0, db_comment='登录次数')
+    failed = models.IntegerField(default=0, db_comment='失败次数')
+
+    class Meta:
+        db_table = 'system_login_log_stat'
+        verbose_name = '登录统计汇总'
+        verbose_name_plural = verbose_name
+        constraints = [
+            models.UniqueConstraint(fields=['dimension', 'period', 'bucket', 'value'], name='uniq_login_log_stat'),
+        ]
+
+
+class LoginLogStatCheckpoint(models.Model):
+    """登录统计汇总的高水位：已汇总的最大 LoginLog.id"""
+    name = models.CharField(max_length=50, unique=True, db_comment='汇总名称')
+    last_id = models.BigIntegerField(default=0, db_comment='已汇总的最大日志 ID')
+    update_time = models.DateTimeField(auto_now=True, db_comment='更新时间')
+
+    class Meta:
+        db_table = 'system_login_log_stat_checkpoint'
+        verbose_name = '登录统计高水位'
+        verbose_name_plural = verbose_name
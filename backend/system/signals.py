@@ -0,0 +1,78 @@
+"""
+@Remark: 系统模块信号，负责相关缓存的失效
+"""
+from django.core.cache import cache
+from django.db.models.signals import pre_save, post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from system.models import Role, RolePermission, Menu, MenuMeta, User, Dept, DeptClosure, DictType, DictData
+from system.model_caches import dict_bundle_cache, user_menu_cache
+from utils.authentication import invalidate_user_snapshot, token_cache_key
+from utils.permissions import permission_cache
+
+
+@receiver(post_save, sender=Role)
+@receiver(post_delete, sender=Role)
+@receiver(post_save, sender=RolePermission)
+@receiver(post_delete, sender=RolePermission)
+@receiver(post_save, sender=Menu)
+@receiver(post_delete, sender=Menu)
+def invalidate_permission_cache(sender, **kwargs):
+    permission_cache.invalidate()
+    user_menu_cache.invalidate()
+
+
+@receiver(post_save, sender=MenuMeta)
+@receiver(post_delete, sender=MenuMeta)
+def invalidate_user_menu_cache(sender, **kwargs):
+    user_menu_cache.invalidate()
+
+
+@receiver(post_save, sender=DictType)
+@receiver(post_delete, sender=DictType)
+@receiver(post_save, sender=DictData)
+@receiver(post_delete, sender=DictData)
+def invalidate_dict_bundle_cache(sender, **kwargs):
+    dict_bundle_cache.invalidate()
+
+
+@receiver(m2m_changed, sender=User.role.through)
+def invalidate_permission_cache_on_user_role(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        permission_cache.invalidate()
+
+
+@receiver(m2m_changed, sender=Role.permissions.through)
+def invalidate_permission_cache_on_role_permissions(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        permission_cache.invalidate()
+        user_menu_cache.invalidate()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_auth_user_snapshot(sender, instance, **kwargs):
+    invalidate_user_snapshot(instance.pk)
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_auth_token(sender, instance, **kwargs):
+    cache.delete(token_cache_key(instance.key))
+
+
+@receiver(pre_save, sender=Dept)
+def remember_dept_parent(sender, instance, **kwargs):
+    """记录保存前的父部门，用于判断是否发生移动"""
+    if instance.pk and not instance._state.adding:
+        instance._closure_old_pid = Dept.objects.filter(pk=instance.pk).values_list('pid_id', flat=True).first()
+
+
+@receiver(post_save, sender=Dept)
+def maintain_dept_closure(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        DeptClosure.insert_node(instance)
+    elif hasattr(instance, '_closure_old_pid') and instance._closure_old_pid != instance.pid_id:
+        DeptClosure.move_subtree(instance)
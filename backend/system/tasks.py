@@ -1,5 +1,8 @@
 # 某个 app 目录下的 tasks.py
+from datetime import timedelta
+
 from celery import shared_task
+from django.utils import timezone
 
 @shared_task
 def add(x, y):
@@ -11,4 +14,49 @@ def sync_temu_order():
 
 @shared_task
 def sync_temu_shipping():
-    pass
\ No newline at end of file
+    pass
+
+@shared_task
+def clear_expired_tokens():
+    """清理超过有效期未续期的 Token"""
+    from rest_framework.authtoken.models import Token
+    from utils.authentication import get_token_expire_seconds
+
+    expired_at = timezone.now() - timedelta(seconds=get_token_expire_seconds())
+    deleted, _ = Token.objects.filter(created__lt=expired_at).delete()
+    return deleted
+
+@shared_task(bind=True)
+def import_data_task(self, viewset_path, user_id, file_name, file_format):
+    """异步导入 xlsx / csv，进度通过视图集的 import_status 查询"""
+    from utils.importer import run_import_task
+
+    return run_import_task(self.request.id, viewset_path, user_id, file_name, file_format)
+
+@shared_task
+def flush_login_logs():
+    """登录日志队列批量落库"""
+    from system.login_log_writer import flush_login_logs as flush
+
+    return flush()
+
+@shared_task
+def resolve_login_locations():
+    """补全登录日志的 IP 归属地"""
+    from system.login_location import resolve_pending_locations
+
+    return resolve_pending_locations()
+
+@shared_task
+def maintain_login_log_partitions():
+    """登录日志分区维护：预建未来分区，归档或删除过期分区"""
+    from system.login_log_partition import maintain_partitions
+
+    return maintain_partitions()
+
+@shared_task
+def rollup_login_logs():
+    """登录日志增量汇总到统计表"""
+    from system.login_log_rollup import rollup_login_logs as rollup
+
+    return rollup()
@@ -1,3 +1,818 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone as dt_timezone
+from ipaddress import ip_address
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.db.models.signals import post_save
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from system.login_location import resolve_pending_locations
+from system.login_log_rollup import rollup_login_logs
+from system.login_log_partition import maintain_partitions
+from system.login_log_writer import (
+    FLUSH_MAX_ATTEMPTS, LOGIN_LOG_DEAD_KEY, LOGIN_LOG_QUEUE_KEY, requeue_failed_events, write_login_events,
+)
+from system.models import (
+    Dept, DeptClosure, DictData, DictType, LoginLog, Menu, MenuMeta, Role, RolePermission, User,
+)
+from system.tasks import clear_expired_tokens
+from system.views.login_log import LoginLogSerializer
+from system.views.menu import get_user_menu_tree
+from utils.authentication import ExpiringTokenAuthentication, cache_token, get_token_expire_seconds, issue_token
+from utils.cache import get_version
+from utils.counting import count_namespace
+from utils.ip_location import get_ip_location, reload_table, write_table
+from utils.pagination import CustomPagination
+from utils.renderers import ORJSONRenderer
+from utils.sparse_fields import get_sparse_plan
+from utils.values_serializer import compile_values_plan
+
+
+class AdminAPITestCase(TestCase):
+    """以超级管理员身份调用管理接口"""
+
+    def setUp(self):
+        self.user = User.objects.create_superuser(username='admin', password='admin123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+
+class DictDataImportTests(AdminAPITestCase):
+
+    def test_import_with_plain_model_serializer(self):
+        dict_type = DictType.objects.create(name='性别', value='sex')
+        content = f'label,value,dict_type\n男,1,{dict_type.pk}\n女,2,{dict_type.pk}\n'.encode()
+        file = SimpleUploadedFile('dict_data.csv', content, content_type='text/csv')
+        response = self.client.post('/api/admin/system/dict_data/import/', {'file': file}, format='multipart')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data']['created'], 2)
+        self.assertEqual(
+            list(DictData.objects.filter(dict_type=dict_type).order_by('value').values_list('label', flat=True)),
+            ['男', '女'],
+        )
+
+
+class UserImportTests(AdminAPITestCase):
+
+    def test_import_updates_existing_user_by_username(self):
+        user = User.objects.create_user(username='alice', password='alice123', nickname='旧昵称')
+        content = 'username,nickname\nalice,新昵称\n'.encode()
+        file = SimpleUploadedFile('users.csv', content, content_type='text/csv')
+        response = self.client.post('/api/admin/system/user/import/', {'file': file}, format='multipart')
+        self.assertEqual(response.status_code, 200)
+        report = response.json()['data']
+        self.assertEqual((report['created'], report['updated']), (0, 1), report)
+        user.refresh_from_db()
+        self.assertEqual(user.nickname, '新昵称')
+        self.assertTrue(user.check_password('alice123'))
+        self.assertEqual(User.objects.filter(username='alice').count(), 1)
+
+    def test_import_revives_soft_deleted_user(self):
+        for bulk in (True, False):
+            with self.subTest(bulk=bulk):
+                User.objects.filter(username='bob').delete()
+                user = User.objects.create_user(username='bob', password='bob123', nickname='旧昵称', is_deleted=True)
+                content = 'username,nickname\nbob,新昵称\n'.encode()
+                file = SimpleUploadedFile('users.csv', content, content_type='text/csv')
+                viewset = 'system.views.user.UserViewSet'
+                with mock.patch(f'{viewset}.can_bulk_import', return_value=bulk):
+                    response = self.client.post('/api/admin/system/user/import/', {'file': file}, format='multipart')
+                self.assertEqual(response.status_code, 200)
+                report = response.json()['data']
+                self.assertEqual((report['created'], report['updated']), (1, 0), report)
+                user.refresh_from_db()
+                self.assertEqual((user.nickname, user.is_deleted), ('新昵称', False))
+                self.assertEqual(User.objects.filter(username='bob').count(), 1)
+
+
+class UserExportTests(AdminAPITestCase):
+
+    def test_export_omits_password(self):
+        response = self.client.get('/api/admin/system/user/export/', {'_format': 'csv'})
+        self.assertEqual(response.status_code, 200)
+        content = b''.join(response.streaming_content).decode('utf-8-sig')
+        header = content.splitlines()[0].split(',')
+        self.assertIn('用户名', header)
+        self.assertNotIn('密码', header)
+        self.assertNotIn('pbkdf2', content)
+
+    def test_list_omits_password(self):
+        response = self.client.get('/api/admin/system/user/')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('password', response.json()['data'][0])
+
+
+class BulkCreateTests(AdminAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.dict_type = DictType.objects.create(name='状态', value='status')
+        self.saved_pks = []
+        post_save.connect(self.on_save, sender=DictData)
+        self.addCleanup(post_save.disconnect, self.on_save, sender=DictData)
+
+    def on_save(self, sender, instance, created, **kwargs):
+        self.saved_pks.append(instance.pk)
+
+    def post_rows(self):
+        rows = [{'label': f'标签{i}', 'value': str(i), 'dict_type': self.dict_type.pk} for i in range(3)]
+        response = self.client.post('/api/admin/system/dict_data/', rows, format='json')
+        self.assertEqual(response.status_code, 200)
+        return [item['id'] for item in response.json()['data']]
+
+    def assert_created(self, ids):
+        self.assertNotIn(None, ids)
+        self.assertCountEqual(ids, DictData.objects.filter(dict_type=self.dict_type).values_list('id', flat=True))
+        self.assertCountEqual(self.saved_pks, ids)
+
+    def test_bulk_create_returns_ids(self):
+        self.assert_created(self.post_rows())
+
+    def test_bulk_create_without_returning_rows(self):
+        # 模拟 MySQL：bulk_create 不返回主键
+        features = type(connection.features)
+        patch = mock.patch.object(features, 'can_return_rows_from_bulk_insert', new_callable=mock.PropertyMock)
+        with patch as can_return_rows:
+            can_return_rows.return_value = False
+            ids = self.post_rows()
+        self.assert_created(ids)
+
+    def test_bulk_create_recovers_ids_from_first_insert_id(self):
+        # 模拟 MySQL 连续自增：每批一条 INSERT，主键由该批第一个 id 推算
+        def get_first_insert_id(connection, count):
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT last_insert_rowid()')
+                return cursor.fetchone()[0] - count + 1
+
+        features = type(connection.features)
+        viewset = 'utils.custom_model_viewSet.CustomModelViewSet'
+        with mock.patch.object(features, 'can_return_rows_from_bulk_insert', new_callable=mock.PropertyMock) as patch, \
+                mock.patch(f'{viewset}.get_bulk_insert_pk_step', return_value=1), \
+                mock.patch(f'{viewset}.get_first_insert_id', side_effect=get_first_insert_id), \
+                CaptureQueriesContext(connection) as queries:
+            patch.return_value = False
+            ids = self.post_rows()
+        self.assert_created(ids)
+        inserts = [query for query in queries if query['sql'].startswith('INSERT INTO "system_dict_data"')]
+        self.assertEqual(len(inserts), 1)
+
+
+class BulkUpdateDeleteTests(AdminAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        dict_type = DictType.objects.create(name='状态', value='status')
+        self.rows = [DictData.objects.create(dict_type=dict_type, label=f'标签{i}', value=str(i)) for i in range(3)]
+
+    def test_bulk_update(self):
+        items = [{'id': row.pk, 'label': f'新标签{row.value}'} for row in self.rows[:2]]
+        response = self.client.post('/api/admin/system/dict_data/bulk_update/', items, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            list(DictData.objects.order_by('value').values_list('label', flat=True)), ['新标签0', '新标签1', '标签2']
+        )
+
+    def test_bulk_update_rejects_missing_id(self):
+        for item in ({'id': 0, 'label': 'x'}, {'id': 'a', 'label': 'x'}):
+            response = self.client.post('/api/admin/system/dict_data/bulk_update/', [item], format='json')
+            self.assertEqual(response.status_code, 400, item)
+
+    def test_bulk_delete(self):
+        ids = [row.pk for row in self.rows[:2]]
+        response = self.client.post('/api/admin/system/dict_data/bulk_delete/', {'ids': ids}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(DictData.objects.values_list('pk', flat=True)), [self.rows[2].pk])
+
+    def test_bulk_delete_rejects_invalid_ids(self):
+        for payload in ({'ids': ['a']}, {'ids': 5}, {'ids': []}, {}):
+            response = self.client.post('/api/admin/system/dict_data/bulk_delete/', payload, format='json')
+            self.assertEqual(response.status_code, 400, payload)
+        self.assertEqual(DictData.objects.count(), 3)
+
+
+class TokenRenewalTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='alice', password='alice123')
+        self.token = issue_token(self.user)
+        self.expire = get_token_expire_seconds()
+
+    def set_created(self, seconds_ago):
+        self.token.created = timezone.now() - timedelta(seconds=seconds_ago)
+        Token.objects.filter(key=self.token.key).update(created=self.token.created)
+        cache_token(self.token)
+
+    def authenticate(self):
+        return ExpiringTokenAuthentication().authenticate_credentials(self.token.key)
+
+    def test_cache_hit_renews_token_after_half_ttl(self):
+        self.set_created(self.expire * 0.6)
+        user, _ = self.authenticate()
+        self.assertEqual(user.pk, self.user.pk)
+        self.token.refresh_from_db()
+        self.assertGreater(self.token.created, timezone.now() - timedelta(seconds=60))
+
+    def test_cache_hit_skips_write_within_half_ttl(self):
+        self.set_created(self.expire * 0.1)
+        created = self.token.created
+        self.authenticate()
+        self.token.refresh_from_db()
+        self.assertEqual(self.token.created, created)
+
+    def test_cleanup_keeps_tokens_in_use(self):
+        self.set_created(self.expire * 0.6)
+        self.authenticate()
+        # 再过半个有效期仍在使用期内，不应被清理
+        later = timezone.now() + timedelta(seconds=self.expire * 0.6)
+        with mock.patch('django.utils.timezone.now', return_value=later):
+            clear_expired_tokens()
+        self.assertTrue(Token.objects.filter(key=self.token.key).exists())
+
+    def test_cleanup_removes_expired_tokens(self):
+        self.set_created(self.expire + 60)
+        self.assertEqual(clear_expired_tokens(), 1)
+        self.assertFalse(Token.objects.filter(key=self.token.key).exists())
+
+
+class TokenCacheOutageTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='alice', password='alice123')
+        broken = mock.MagicMock()
+        for method in ('get', 'set', 'delete', 'touch'):
+            getattr(broken, method).side_effect = ConnectionError('redis down')
+        patch = mock.patch('utils.authentication.cache', broken)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def test_issue_and_authenticate_fall_back_to_database(self):
+        token = issue_token(self.user)
+        self.assertTrue(Token.objects.filter(key=token.key).exists())
+        user, _ = ExpiringTokenAuthentication().authenticate_credentials(token.key)
+        self.assertEqual(user.pk, self.user.pk)
+
+
+class LoginLogRetentionTests(TestCase):
+
+    def create_log(self, create_time):
+        log = LoginLog.objects.create(username='alice', user_ip='10.0.0.1', user_agent='test')
+        LoginLog.objects.filter(pk=log.pk).update(create_time=create_time)
+        return log
+
+    def test_retention_is_opt_in(self):
+        self.create_log(timezone.now() - timedelta(days=3650))
+        self.assertEqual(maintain_partitions()['purged'], 0)
+        self.assertEqual(LoginLog.objects.count(), 1)
+
+    def test_purge_expired_rows(self):
+        self.create_log(timezone.now() - timedelta(days=400))
+        kept = self.create_log(timezone.now())
+        result = maintain_partitions(retention=12)
+        self.assertEqual(result['purged'], 1)
+        self.assertEqual(list(LoginLog.objects.values_list('pk', flat=True)), [kept.pk])
+
+
+class LoginLogWriterTests(TestCase):
+
+    def test_create_time_is_login_time(self):
+        login_time = timezone.now() - timedelta(minutes=5)
+        write_login_events([{
+            'user_id': None, 'username': 'alice', 'result': LoginLog.LoginResult.FAILED,
+            'user_ip': '10.0.0.1', 'user_agent': 'test', 'location': '内网地址', 'time': login_time.isoformat(),
+        }])
+        self.assertEqual(LoginLog.objects.get().create_time, login_time)
+
+    def test_failed_events_move_to_dead_letter_after_max_attempts(self):
+        conn = mock.MagicMock()
+        pipe = conn.pipeline.return_value.__enter__.return_value
+        items = [
+            json.dumps({'username': 'alice', 'attempts': FLUSH_MAX_ATTEMPTS - 1}),
+            json.dumps({'username': 'bob'}),
+            'not json',
+        ]
+        requeue_failed_events(conn, items, RuntimeError('db down'))
+        retry = [json.loads(item) for item in pipe.lpush.call_args.args[1:]]
+        self.assertEqual(pipe.lpush.call_args.args[0], LOGIN_LOG_QUEUE_KEY)
+        self.assertEqual(retry, [{'username': 'bob', 'attempts': 1}])
+        dead = pipe.rpush.call_args.args
+        self.assertEqual(dead[0], LOGIN_LOG_DEAD_KEY)
+        self.assertEqual(json.loads(dead[1])['error'], 'db down')
+        self.assertEqual(dead[2], 'not json')
+
+
+class LoginLocationTests(TestCase):
+
+    def test_resolve_pending_locations(self):
+        LoginLog.objects.bulk_create([
+            LoginLog(username='alice', user_ip='127.0.0.1', user_agent='test'),
+            LoginLog(username='bob', user_ip='192.168.1.10', user_agent='test'),
+            LoginLog(username='carol', user_ip='10.0.0.1', user_agent='test', location='已解析'),
+        ])
+        self.assertEqual(resolve_pending_locations(batch_size=1), 2)
+        self.assertEqual(
+            dict(LoginLog.objects.values_list('username', 'location')),
+            {'alice': '本地网络', 'bob': '内网地址', 'carol': '已解析'},
+        )
+
+
+class IPLocationTests(TestCase):
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.path = os.path.join(tmp_dir.name, 'ip_location.dat')
+        ranges = [
+            (int(ip_address('8.8.8.0')), int(ip_address('8.8.8.255')), '美国'),
+            (int(ip_address('8.8.9.0')), int(ip_address('8.8.9.255')), '美国'),
+            (int(ip_address('1.0.0.0')), int(ip_address('1.0.0.255')), '澳大利亚'),
+        ]
+        # 相邻且地名相同的区间合并
+        self.assertEqual(write_table(ranges, self.path), 2)
+        settings_patch = override_settings(IP_LOCATION_DB=self.path)
+        settings_patch.enable()
+        self.addCleanup(settings_patch.disable)
+        reload_table()
+        self.addCleanup(reload_table)
+
+    def test_lookup(self):
+        self.assertEqual(get_ip_location('8.8.9.8'), '美国')
+        self.assertEqual(get_ip_location('1.0.0.1'), '澳大利亚')
+        self.assertEqual(get_ip_location('::ffff:1.0.0.1'), '澳大利亚')
+        self.assertEqual(get_ip_location('8.8.4.4'), '未知位置')
+        self.assertEqual(get_ip_location('192.168.1.1'), '内网地址')
+        self.assertEqual(get_ip_location('127.0.0.1'), '本地网络')
+        self.assertEqual(get_ip_location('not-an-ip'), '未知位置')
+
+    def test_repeated_lookups_hit_cache(self):
+        get_ip_location('8.8.8.8')
+        hits = get_ip_location.cache_info().hits
+        with mock.patch('utils.ip_location.get_table') as get_table:
+            self.assertEqual(get_ip_location('8.8.8.8'), '美国')
+        get_table.assert_not_called()
+        self.assertEqual(get_ip_location.cache_info().hits, hits + 1)
+
+    def test_missing_table(self):
+        with override_settings(IP_LOCATION_DB=f'{self.path}.missing'):
+            reload_table()
+            self.assertEqual(get_ip_location('8.8.8.8'), '未知位置')
+
+
+def create_menu(name, pid=None, type='menu', sort=0):
+    return Menu.objects.create(name=name, pid=pid, type=type, sort=sort, meta=MenuMeta.objects.create(title=name))
+
+
+class MenuTreeTests(AdminAPITestCase):
+    url = '/api/admin/system/menu/'
+
+    def setUp(self):
+        super().setUp()
+        self.root = create_menu('系统管理', type='catalog', sort=1)
+        self.child = create_menu('用户管理', pid=self.root)
+        create_menu('新增用户', pid=self.child, type='button')
+        create_menu('AI', type='catalog', sort=2)
+
+    def test_list_builds_nested_tree(self):
+        data = self.client.get(self.url).json()['data']
+        self.assertEqual([menu['name'] for menu in data], ['系统管理', 'AI'])
+        child = data[0]['children'][0]
+        self.assertEqual((child['name'], child['parent']), ('用户管理', '系统管理'))
+        self.assertEqual([menu['name'] for menu in child['children']], ['新增用户'])
+        self.assertEqual(data[1]['children'], [])
+
+    def test_query_count_does_not_grow_with_nodes(self):
+        with CaptureQueriesContext(connection) as before:
+            self.client.get(self.url)
+        parent = self.child
+        for i in range(5):
+            parent = create_menu(f'子菜单{i}', pid=parent)
+        with CaptureQueriesContext(connection) as after:
+            response = self.client.get(self.url)
+        self.assertEqual(len(after), len(before))
+        self.assertEqual(len(response.json()['data'][0]['children'][0]['children']), 2)
+
+
+class UserMenuTreeTests(TransactionTestCase):
+    """用户菜单树在事务提交后失效，使用真实提交"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='alice', password='alice123')
+        self.role = Role.objects.create(name='运营')
+        self.user.role.add(self.role)
+        root = create_menu('系统管理', type='catalog')
+        users = create_menu('用户管理', pid=root, sort=1)
+        self.depts = create_menu('部门管理', pid=root, sort=2)
+        self.role.permissions.add(root, users, create_menu('新增用户', pid=users, type='button'))
+
+    def menu_names(self):
+        return [(menu['name'], [child['name'] for child in menu['children']]) for menu in get_user_menu_tree(self.user)]
+
+    def test_tree_is_cached_per_role_set_and_invalidated(self):
+        self.assertEqual(self.menu_names(), [('系统管理', ['用户管理'])])
+        with self.assertNumQueries(0):
+            self.menu_names()
+
+        self.role.permissions.add(self.depts)
+        self.assertEqual(self.menu_names(), [('系统管理', ['用户管理', '部门管理'])])
+
+
+class DeptClosureTests(AdminAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.head = Dept.objects.create(name='总部')
+        self.tech = Dept.objects.create(name='技术部', pid=self.head)
+        self.backend = Dept.objects.create(name='后端组', pid=self.tech)
+        self.sales = Dept.objects.create(name='销售部')
+
+    def links(self):
+        return set(DeptClosure.objects.values_list('ancestor__name', 'descendant__name', 'depth'))
+
+    def test_closure_follows_insert_and_move(self):
+        self.assertEqual(
+            {(a, d, depth) for a, d, depth in self.links() if d == '后端组'},
+            {('后端组', '后端组', 0), ('技术部', '后端组', 1), ('总部', '后端组', 2)},
+        )
+        self.tech.pid = self.sales
+        self.tech.save()
+        self.assertEqual(
+            {(a, d, depth) for a, d, depth in self.links() if d == '后端组'},
+            {('后端组', '后端组', 0), ('技术部', '后端组', 1), ('销售部', '后端组', 2)},
+        )
+        links = self.links()
+        DeptClosure.rebuild()
+        self.assertEqual(self.links(), links)
+
+    def test_user_filter_includes_sub_depts(self):
+        alice = User.objects.create_user(username='alice', password='alice123')
+        alice.dept.add(self.backend)
+        User.objects.create_user(username='bob', password='bob123').dept.add(self.sales)
+        response = self.client.get('/api/admin/system/user/', {'dept': self.head.pk})
+        self.assertEqual([user['username'] for user in response.json()['data']], ['alice'])
+
+    def test_reject_move_under_own_descendant(self):
+        response = self.client.patch(
+            f'/api/admin/system/dept/{self.head.pk}/', {'pid': self.backend.pk}, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('pid', response.json())
+
+
+class UserRelationSerializationTests(AdminAPITestCase):
+    url = '/api/admin/system/user/'
+
+    def setUp(self):
+        super().setUp()
+        self.role = Role.objects.create(name='运营')
+        self.dept = Dept.objects.create(name='技术部')
+
+    def create_users(self, count, start=0):
+        for i in range(start, start + count):
+            user = User.objects.create_user(username=f'user{i}', password='user123')
+            user.role.add(self.role)
+            user.dept.add(self.dept)
+
+    def test_role_and_dept_names_use_prefetch(self):
+        self.create_users(2)
+        with CaptureQueriesContext(connection) as before:
+            self.client.get(self.url)
+        self.create_users(4, start=2)
+        with CaptureQueriesContext(connection) as after:
+            response = self.client.get(self.url)
+        self.assertEqual(len(after), len(before))
+        users = [user for user in response.json()['data'] if user['username'] != 'admin']
+        self.assertEqual(len(users), 6)
+        for user in users:
+            self.assertEqual((user['roles'], user['depts']), (['运营'], ['技术部']))
+
+
+class SparseFieldsTests(AdminAPITestCase):
+    url = '/api/admin/system/user/'
+
+    def test_fields_pushed_down_to_query(self):
+        self.user.role.add(Role.objects.create(name='运营'))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, {'_fields': 'id,username,roles'})
+        self.assertEqual(response.json()['data'], [{'id': self.user.pk, 'username': 'admin', 'roles': ['运营']}])
+        sql = '\n'.join(query['sql'] for query in queries)
+        user_query = next(query['sql'] for query in queries if query['sql'].startswith('SELECT "system_users"."id"'))
+        self.assertNotIn('"password"', user_query)
+        for table in ('system_dept', 'system_post', 'auth_group', 'auth_permission'):
+            self.assertNotIn(f'"{table}"', sql)
+
+    def test_exclude_keeps_other_fields(self):
+        data = self.client.get(self.url, {'_exclude': 'roles,depts'}).json()['data'][0]
+        self.assertNotIn('roles', data)
+        self.assertEqual((data['username'], data['dept']), ('admin', []))
+
+
+class RolePermissionTests(AdminAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.menus = [
+            Menu.objects.create(name=f'按钮{i}', type='button', meta=MenuMeta.objects.create(title=f'按钮{i}'))
+            for i in range(3)
+        ]
+        self.menu_ids = [menu.pk for menu in self.menus]
+
+    def role_menu_ids(self, role_id):
+        return set(RolePermission.objects.filter(role_id=role_id).values_list('menu_id', flat=True))
+
+    def test_create_and_assign_by_set_difference(self):
+        response = self.client.post(
+            '/api/admin/system/role/', {'name': '运营', 'permissions': self.menu_ids[:2]}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        role_id = response.json()['data']['id']
+        self.assertEqual(self.role_menu_ids(role_id), set(self.menu_ids[:2]))
+        kept = RolePermission.objects.get(role_id=role_id, menu_id=self.menu_ids[1]).pk
+
+        response = self.client.post(
+            f'/api/admin/system/role/{role_id}/assign_permissions/', {'menu_ids': self.menu_ids[1:]}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertCountEqual(response.json()['permissions'], self.menu_ids[1:])
+        self.assertEqual(self.role_menu_ids(role_id), set(self.menu_ids[1:]))
+        # 未变化的权限行保留，不做删除重建
+        self.assertTrue(RolePermission.objects.filter(pk=kept).exists())
+
+    def test_unknown_menu_ids_are_rejected(self):
+        unknown = max(self.menu_ids) + 100
+        response = self.client.post(
+            '/api/admin/system/role/', {'name': '运营', 'permissions': [self.menu_ids[0], unknown]}, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Role.objects.filter(name='运营').exists())
+
+        role = Role.objects.create(name='审计')
+        response = self.client.post(
+            f'/api/admin/system/role/{role.pk}/assign_permissions/', {'menu_ids': [unknown]}, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.role_menu_ids(role.pk), set())
+
+
+class CountCacheTests(TestCase):
+
+    def count_version(self, model):
+        return get_version(count_namespace(model))
+
+    def test_only_cached_count_models_invalidate_on_save(self):
+        log_version, dict_version = self.count_version(LoginLog), self.count_version(DictType)
+        with self.captureOnCommitCallbacks(execute=True):
+            LoginLog.objects.create(username='alice', user_ip='10.0.0.1', user_agent='test')
+            DictType.objects.create(name='性别', value='sex')
+        self.assertNotEqual(self.count_version(LoginLog), log_version)
+        self.assertEqual(self.count_version(DictType), dict_version)
+
+    def test_base_queryset_filters_do_not_count_as_filtered(self):
+        pagination = CustomPagination()
+        view = mock.Mock(base_queryset=LoginLog.objects.filter(is_deleted=False))
+        self.assertFalse(pagination.is_filtered(view.base_queryset.order_by('-id').all(), view))
+        self.assertTrue(pagination.is_filtered(view.base_queryset.filter(username='alice'), view))
+
+
+class LoginLogCountTests(AdminAPITestCase):
+    url = '/api/admin/system/login_log/'
+
+    def setUp(self):
+        super().setUp()
+        LoginLog.objects.create(username='alice', user_ip='10.0.0.1', user_agent='test')
+
+    def get_page(self, **params):
+        # MySQL 行数估算在 sqlite 下不可用，直接给出估算值
+        with mock.patch('utils.counting.get_estimated_count', return_value=200000) as estimate:
+            response = self.client.get(self.url, {'page': 1, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()['data'], estimate
+
+    def test_unfiltered_list_uses_estimate(self):
+        data, estimate = self.get_page()
+        estimate.assert_called_once_with(LoginLog)
+        self.assertEqual((data['total'], data['total_exact']), (200000, False))
+
+    def test_filtered_list_counts_exactly(self):
+        data, estimate = self.get_page(username='alice')
+        estimate.assert_not_called()
+        self.assertEqual((data['total'], data['total_exact']), (1, True))
+
+
+class CursorPaginationTests(AdminAPITestCase):
+    url = '/api/admin/system/dict_data/'
+
+    def setUp(self):
+        super().setUp()
+        dict_type = DictType.objects.create(name='状态', value='status')
+        # sort 有重复值，游标需追加主键保证顺序唯一
+        self.rows = [
+            DictData.objects.create(dict_type=dict_type, label=f'标签{i}', value=str(i), sort=i // 2) for i in range(5)
+        ]
+
+    def get_page(self, cursor=''):
+        response = self.client.get(self.url, {'cursor': cursor, 'pageSize': 2, 'ordering': '-sort'})
+        self.assertEqual(response.status_code, 200)
+        return response.json()['data']
+
+    def test_walks_forward_and_back_without_gaps(self):
+        expected = [row.pk for row in sorted(self.rows, key=lambda row: (-row.sort, -row.pk))]
+        pages, page = [], self.get_page()
+        pages.append(page)
+        while page['next']:
+            page = self.get_page(page['next'])
+            pages.append(page)
+        self.assertEqual([item['id'] for page in pages for item in page['items']], expected)
+        self.assertEqual([len(page['items']) for page in pages], [2, 2, 1])
+        self.assertIsNone(pages[0]['previous'])
+
+        previous = self.get_page(pages[1]['previous'])
+        self.assertEqual([item['id'] for item in previous['items']], expected[:2])
+
+    def test_rejects_invalid_cursor(self):
+        response = self.client.get(self.url, {'cursor': 'not-a-cursor', 'pageSize': 2})
+        self.assertEqual(response.status_code, 404)
+
+
+class StreamingListTests(AdminAPITestCase):
+    url = '/api/admin/system/dict_data/'
+
+    def setUp(self):
+        super().setUp()
+        dict_type = DictType.objects.create(name='状态', value='status')
+        for i in range(5):
+            DictData.objects.create(dict_type=dict_type, label=f'标签{i}', value=str(i))
+        # 每批 2 行，覆盖多批拼接
+        patch = mock.patch('system.views.dict_data.DictDataViewSet.stream_chunk_size', 2)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def get_stream(self, stream_format):
+        response = self.client.get(self.url, {'_stream': stream_format, 'ordering': 'id'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_json_stream_matches_list(self):
+        expected = self.client.get(self.url, {'ordering': 'id'}).json()
+        _, content = self.get_stream('json')
+        self.assertEqual(json.loads(content), expected)
+        self.assertEqual(len(expected['data']), 5)
+
+    def test_ndjson_stream(self):
+        expected = self.client.get(self.url, {'ordering': 'id'}).json()['data']
+        response, content = self.get_stream('ndjson')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual([json.loads(line) for line in content.splitlines()], expected)
+
+
+class DictBundleTests(TransactionTestCase):
+    """缓存在事务提交后失效，使用真实提交"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser(username='admin', password='admin123'))
+
+    def test_bundle_etag_changes_after_dict_update(self):
+        dict_type = DictType.objects.create(name='性别', value='sex')
+        DictData.objects.create(dict_type=dict_type, label='男', value='1')
+        url = '/api/admin/system/dict_data/bundle/'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        DictData.objects.create(dict_type=dict_type, label='女', value='2')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class ORJSONRendererTests(TestCase):
+
+    def test_matches_drf_renderer(self):
+        data = {
+            'time': datetime(2024, 1, 2, 3, 4, 5, 123456, tzinfo=dt_timezone.utc),
+            'name': '管理员',
+            1: [1.5, None],
+        }
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_escapes_line_separators_like_drf(self):
+        data = {'text': '第一行\u2028第二行\u2029第三段'}
+        content = ORJSONRenderer().render(data)
+        self.assertEqual(content, JSONRenderer().render(data))
+        self.assertNotIn('\u2028'.encode(), content)
+        self.assertEqual(json.loads(content), data)
+
+    def test_falls_back_for_wide_integers(self):
+        data = {'id': 2 ** 70}
+        self.assertEqual(ORJSONRenderer().render(data), b'{"id":1180591620717411303424}')
+
+
+class ButtonPermissionTests(TransactionTestCase):
+    """按钮权限缓存在事务提交后失效，使用真实提交"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='alice', password='alice123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.role = Role.objects.create(name='运营')
+        self.user.role.add(self.role)
+        self.button = Menu.objects.create(
+            name='字典查询', type='button', auth_code='system:dicttype:query',
+            meta=MenuMeta.objects.create(title='查询'),
+        )
+
+    def test_permission_changes_take_effect(self):
+        url = '/api/admin/system/dict_type/'
+        self.assertEqual(self.client.get(url).status_code, 403)
+        # 未授权结果同样缓存，仍为 403
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        self.role.permissions.add(self.button)
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+        self.user.role.remove(self.role)
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+
+class CustomResultTextSerializer(serializers.ModelSerializer):
+    result_text = serializers.SerializerMethodField()
+
+    class Meta:
+        model = LoginLog
+        fields = ['id', 'result', 'result_text']
+
+    def get_result_text(self, obj):
+        return f'{obj.get_result_display()}（{obj.username}）'
+
+
+class ValuesSerializerTests(TestCase):
+
+    def setUp(self):
+        LoginLog.objects.create(username='alice', user_ip='10.0.0.1', user_agent='test')
+        LoginLog.objects.create(
+            username='bob', user_ip='10.0.0.2', user_agent='test', result=LoginLog.LoginResult.FAILED
+        )
+        self.queryset = LoginLog.objects.order_by('id')
+
+    def test_stock_choice_display_matches_serializer(self):
+        serializer = LoginLogSerializer(self.queryset, many=True)
+        plan = compile_values_plan(serializer.child, LoginLog)
+        self.assertIsNotNone(plan)
+        self.assertEqual(plan.serialize(self.queryset.values(*plan.lookups)), serializer.data)
+
+    def test_custom_text_method_is_not_compiled(self):
+        serializer = CustomResultTextSerializer(self.queryset, many=True)
+        self.assertIsNone(compile_values_plan(serializer.child, LoginLog))
+        self.assertIsNone(get_sparse_plan(serializer.child, LoginLog))
+        self.assertEqual(serializer.data[0]['result_text'], '成功（alice）')
+
+
+class LoginAnalyticsTests(AdminAPITestCase):
+    url = '/api/admin/system/login_log/analytics/'
+
+    def test_summary_from_rollup(self):
+        login_time = timezone.now() - timedelta(hours=2)
+        write_login_events([
+            {
+                'user_id': None, 'username': username, 'result': result, 'user_ip': '10.0.0.1',
+                'user_agent': 'test', 'location': '内网地址', 'time': login_time.isoformat(),
+            }
+            for username, result in (('alice', 1), ('alice', 0), ('bob', 1))
+        ])
+        # 落库时间早于汇总的等待窗口
+        LoginLog.objects.update(update_time=login_time)
+        self.assertEqual(rollup_login_logs(), 3)
+
+        response = self.client.get(self.url, {'period': 'hour', 'dimension': 'username'})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()['data']
+        self.assertEqual(data['summary'], {'total': 3, 'failed': 1, 'failure_rate': 0.3333})
+        self.assertEqual(len(data['series']), 24)
+        self.assertEqual(data['top'][0], {'value': 'alice', 'total': 2, 'failed': 1})
+
+    def test_invalid_params_return_400(self):
+        for params in (
+            {'period': 'week'},
+            {'dimension': 'browser'},
+            {'start': 'yesterday'},
+            {'start': '2024-02-30'},
+            {'end': '2024-01-01 25:00'},
+            {'top': 'x'},
+            {'start': '2024-01-02', 'end': '2024-01-01'},
+        ):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(self.url, params).status_code, 400)
@@ -7,7 +7,8 @@ from rest_framework import status, serializers
 from rest_framework.decorators import action
 from rest_framework.filters import SearchFilter, OrderingFilter
 
-from system.models import Dept
+from system.model_caches import dept_cache
+from system.models import Dept, DeptClosure
 from utils.custom_model_viewSet import CustomModelViewSet
 from utils.serializers import CustomModelSerializer
 
@@ -33,6 +34,14 @@ class DeptSerializer(CustomModelSerializer):
         """获取状态文本"""
         return obj.get_status_display()
 
+    def validate_pid(self, value):
+        """不允许把部门移动到自身或其子部门下"""
+        if value and self.instance and DeptClosure.objects.filter(
+            ancestor_id=self.instance.pk, descendant_id=value.pk
+        ).exists():
+            raise serializers.ValidationError('不能将部门移动到自身或其子部门下')
+        return value
+
 
 class DeptViewSet(CustomModelViewSet):
     """部门管理视图集"""
@@ -44,6 +53,12 @@ class DeptViewSet(CustomModelViewSet):
     filterset_fields = ['status', 'pid']
     search_fields = ['name']
     ordering_fields = ['create_time', 'name']
+    # 部门闭包表依赖逐条保存时的主键与信号维护
+    bulk_create_enabled = False
+    bulk_update_enabled = False
+
+    def get_bulk_queryset(self):
+        return Dept.objects.all()
 
     def perform_create(self, serializer):
         # 自动设置创建时间
@@ -82,7 +97,7 @@ class DeptViewSet(CustomModelViewSet):
     @action(detail=False, methods=['get'])
     def tree(self, request):
         """一次性查出所有部门，构建树形结构"""
-        all_depts = Dept.objects.all().order_by('sort', 'id')
+        all_depts = dept_cache.filter('tree')
         dept_dict = {}
         children_map = defaultdict(list)
 
@@ -1,12 +1,16 @@
-from rest_framework import serializers, viewsets
-from system.models import DictData
+import hashlib
+
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import serializers, status, viewsets
+from system.model_caches import dict_bundle_cache, dict_data_cache
+from system.models import DictData, DictType
 from utils.custom_model_viewSet import CustomModelViewSet
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters import rest_framework as filters
 
 from utils.models import CommonStatus
-
+from utils.renderers import dumps
 
 class DictDataSerializer(serializers.ModelSerializer):
 
@@ -29,6 +33,28 @@ class DictDataLabelValueSerializer(serializers.ModelSerializer):
         fields = ['label', 'value', 'dict_type']
 
 
+def build_dict_bundle():
+    """
+    构建字典快照：{'version': 内容哈希, 'dicts': {dict_type: [{label, value, color_type, css_class}]}}
+    只包含启用且未删除的字典类型与字典数据
+    """
+    dicts = {
+        value: [] for value in DictType.objects.filter(status=CommonStatus.ENABLED, is_deleted=False)
+        .order_by('value').values_list('value', flat=True)
+    }
+    rows = DictData.objects.filter(
+        status=CommonStatus.ENABLED, is_deleted=False,
+        dict_type__status=CommonStatus.ENABLED, dict_type__is_deleted=False,
+    ).order_by('dict_type__value', 'sort', 'id').values_list('dict_type__value', 'label', 'value', 'color_type', 'css_class')
+    for dict_type, label, value, color_type, css_class in rows:
+        dicts[dict_type].append({'label': label, 'value': value, 'color_type': color_type, 'css_class': css_class})
+    return {'version': hashlib.md5(dumps(dicts)).hexdigest(), 'dicts': dicts}
+
+
+def get_dict_bundle():
+    return dict_bundle_cache.get_or_set('all', build_dict_bundle)
+
+
 class DictDataViewSet(CustomModelViewSet):
     queryset = DictData.objects.filter(is_deleted=False)
     serializer_class = DictDataSerializer
@@ -36,7 +62,31 @@ class DictDataViewSet(CustomModelViewSet):
 
     @action(detail=False, methods=['get'])
     def simple(self, request):
-        # 复用filterset_class过滤DictData
-        queryset = self.get_queryset().filter(status=CommonStatus.ENABLED)
+        # 启用的字典数据走模型缓存（DictType/DictData 变更时失效）
+        queryset = dict_data_cache.filter('enabled')
         serializer = DictDataLabelValueSerializer(queryset, many=True)
-        return self._build_response(data=serializer.data)
\ No newline at end of file
+        return self._build_response(data=serializer.data)
+
+    @action(detail=False, methods=['get'])
+    def bundle(self, request):
+        """
+        一次返回全部启用字典（或 ?types=a,b 指定的类型），按字典类型分组
+        响应带 ETag，客户端携带 If-None-Match 且内容未变化时返回 304
+        """
+        bundle = get_dict_bundle()
+        types = [item for item in request.query_params.get('types', '').split(',') if item]
+        if types:
+            types = sorted(set(types))
+            dicts = {dict_type: bundle['dicts'].get(dict_type, []) for dict_type in types}
+            version = hashlib.md5(f"{bundle['version']}:{','.join(types)}".encode()).hexdigest()
+        else:
+            dicts = bundle['dicts']
+            version = bundle['version']
+        etag = quote_etag(version)
+        if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = self._build_response(data={'version': version, 'dicts': dicts})
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
@@ -1,5 +1,11 @@
-from system.models import LoginLog
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+
+from system.login_log_rollup import MAX_SERIES_POINTS, get_login_analytics, resolve_range
+from system.models import LoginLog, LoginLogStat
 from utils.serializers import CustomModelSerializer
+from utils.counting import CountStrategy
 from utils.custom_model_viewSet import CustomModelViewSet
 from rest_framework import serializers
 from utils.permissions import HasButtonPermission
@@ -39,4 +45,48 @@ class LoginLogViewSet(CustomModelViewSet):
     search_fields = ['username']
     ordering_fields = ['create_time', 'id']
     ordering = ['-create_time']
+    count_strategy = CountStrategy.ESTIMATE
+    stream_format = 'json'
+    use_values_serializer = True
     permission_classes = [HasButtonPermission]
+
+    @action(detail=False, methods=['get'])
+    def analytics(self, request, *args, **kwargs):
+        """
+        登录统计看板，读取预聚合汇总表
+        ?period=day|hour&dimension=result|location|username&start=&end=&top=10
+        """
+        params = request.query_params
+        period = params.get('period', LoginLogStat.Period.DAY)
+        dimension = params.get('dimension', LoginLogStat.Dimension.RESULT)
+        if period not in LoginLogStat.Period.values:
+            raise ValidationError({'period': ['仅支持 day、hour']})
+        if dimension not in LoginLogStat.Dimension.values:
+            raise ValidationError({'dimension': ['仅支持 result、location、username']})
+        start = self._parse_analytics_time(params, 'start')
+        end = self._parse_analytics_time(params, 'end')
+        try:
+            top = min(max(int(params.get('top', 10)), 1), 100)
+        except ValueError:
+            raise ValidationError({'top': ['请输入整数']})
+        _, _, points = resolve_range(period, start, end)
+        if points < 1:
+            raise ValidationError({'end': ['结束时间不能早于开始时间']})
+        if points > MAX_SERIES_POINTS:
+            raise ValidationError({'start': [f'统计区间不能超过 {MAX_SERIES_POINTS} 个时段']})
+        data = get_login_analytics(period, dimension, start, end, top)
+        return self._build_response(data=data, message="ok")
+
+    @staticmethod
+    def _parse_analytics_time(params, name):
+        value = params.get(name)
+        if not value:
+            return None
+        try:
+            # 格式正确但日期/时间不存在（如 2024-02-30、25:00）时抛出 ValueError
+            parsed = parse_datetime(value) or parse_date(value)
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            raise ValidationError({name: ['时间格式应为 YYYY-MM-DD 或 YYYY-MM-DD HH:MM']})
+        return parsed
@@ -1,12 +1,17 @@
+import hashlib
+
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import viewsets, serializers, status
 from rest_framework.decorators import action
 from rest_framework.filters import SearchFilter, OrderingFilter
 from rest_framework.response import Response
 
+from system.model_caches import user_menu_cache
 from system.models import Menu, MenuMeta
 from utils.custom_model_viewSet import CustomModelViewSet
+from utils.permissions import get_user_role_ids
 from utils.serializers import CustomModelSerializer
+from utils.tree import build_tree_index, get_tree_children
 
 
 class MenuMetaSerializer(serializers.ModelSerializer):
@@ -44,8 +49,10 @@ class MenuSerializer(CustomModelSerializer):
         read_only_fields = ['id', 'create_time', 'update_time']
 
     def get_children(self, obj):
-        """获取子菜单"""
-        children = obj.children.all().order_by('sort')
+        """获取子菜单，优先使用内存中组装好的子节点"""
+        children = get_tree_children(obj)
+        if children is None:
+            children = obj.children.all().order_by('sort')
         if children:
             return MenuSerializer(children, many=True).data
         return []
@@ -77,6 +84,11 @@ class MenuSerializer(CustomModelSerializer):
 
 class MenuUserSerializer(MenuSerializer):
     def get_children(self, obj):
+        children = get_tree_children(obj)
+        if children is not None:
+            if children:
+                return MenuUserSerializer(children, many=True, context=self.context).data
+            return []
         request = self.context.get('request')
         children_qs = obj.children.exclude(type='button').order_by('sort')
         if request and hasattr(request, 'user') and request.user.is_authenticated and not request.user.is_superuser:
@@ -87,6 +99,28 @@ class MenuUserSerializer(MenuSerializer):
         return []
 
 
+def build_user_menu_tree(role_ids=None):
+    """
+    计算角色集合可见的菜单树（排除按钮，按 sort 排序）
+    role_ids 为 None 时表示超级用户，可见全部菜单
+    """
+    menus = Menu.objects.exclude(type='button').select_related('meta').order_by('sort', 'id')
+    if role_ids is not None:
+        menus = menus.filter(role__id__in=role_ids).distinct()
+    index = build_tree_index(list(menus))
+    roots = [menu for menu in index.values() if menu.pid_id is None]
+    return list(MenuUserSerializer(roots, many=True).data)
+
+
+def get_user_menu_tree(user):
+    """按用户角色集合读取物化菜单树"""
+    if user.is_superuser:
+        return user_menu_cache.get_or_set('superuser', build_user_menu_tree)
+    role_ids = get_user_role_ids(user)
+    role_hash = hashlib.md5(','.join(map(str, role_ids)).encode()).hexdigest()
+    return user_menu_cache.get_or_set(f'roles:{role_hash}', lambda: build_user_menu_tree(role_ids))
+
+
 class MenuMetaViewSet(viewsets.ModelViewSet):
     """菜单元数据视图集"""
     queryset = MenuMeta.objects.all()
@@ -95,18 +129,42 @@ class MenuMetaViewSet(viewsets.ModelViewSet):
 
 class MenuViewSet(CustomModelViewSet):
     """菜单管理视图集"""
-    queryset = Menu.objects.filter(pid__isnull=True).order_by('sort', 'id', 'status').prefetch_related('children')
+    queryset = Menu.objects.filter(pid__isnull=True).order_by('sort', 'id', 'status').select_related('meta')
     serializer_class = MenuSerializer
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     filterset_fields = ['status', 'type', 'pid', 'name']
     search_fields = ['name', 'path', 'auth_code']
     ordering_fields = ['meta__sort', 'create_time']
 
+    def get_bulk_queryset(self):
+        return Menu.objects.all()
+
+    def attach_menu_tree(self, roots):
+        """一次查询加载全部菜单，在内存中为根节点组装子树"""
+        all_menus = list(Menu.objects.select_related('meta').order_by('sort', 'id'))
+        index = build_tree_index(all_menus)
+        return [index[root.pk] for root in roots if root.pk in index]
+
+    def list(self, request, *args, **kwargs):
+        """菜单列表（树形），查询次数与节点数量无关"""
+        queryset = self.filter_queryset(self.get_queryset())
+        if 'page' in request.query_params:
+            page = self.paginate_queryset(queryset)
+            if page is not None:
+                serializer = self.get_serializer(self.attach_menu_tree(page), many=True)
+                return self.get_paginated_response(serializer.data)
+        serializer = self.get_serializer(self.attach_menu_tree(queryset), many=True)
+        return self._build_response(
+            data=serializer.data,
+            message="ok",
+            status=status.HTTP_200_OK
+        )
+
     @action(detail=False, methods=['get'])
     def tree(self, request):
         """获取菜单树形结构"""
         queryset = self.get_queryset().filter(pid__isnull=True)
-        serializer = self.get_serializer(queryset, many=True)
+        serializer = self.get_serializer(self.attach_menu_tree(queryset), many=True)
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'], url_path='name-exists')
@@ -134,15 +192,7 @@ class MenuViewSet(CustomModelViewSet):
 
     @action(detail=False, methods=['get'], url_path='user_menu')
     def user_menu(self, request):
-        user = self.request.user
-        if user.is_superuser:
-            menus = Menu.objects.filter(pid__isnull=True).exclude(type='button').order_by('sort')
-        else:
-            role_ids = user.role.values_list('id', flat=True)
-            menus = Menu.objects.filter(pid__isnull=True,
-                                        role__id__in=role_ids
-                                        ).exclude(type='button').order_by('sort').distinct()
-        menus_data = MenuUserSerializer(menus, many=True, context={'request': request}).data
+        menus_data = get_user_menu_tree(self.request.user)
         return self._build_response(data=menus_data)
 
     def update(self, request, *args, **kwargs):
@@ -1,16 +1,57 @@
+from django.db import router, transaction
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status, serializers
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.filters import SearchFilter, OrderingFilter
-from rest_framework.generics import get_object_or_404
 from rest_framework.response import Response
 from django_filters import rest_framework as filters
 
+from system.model_caches import role_cache, user_menu_cache
 from system.models import RolePermission, Menu, Role
+from utils.counting import invalidate_count
 from utils.custom_model_viewSet import CustomModelViewSet
+from utils.permissions import permission_cache
 from utils.serializers import CustomModelSerializer
 
 
+def set_role_permissions(role, menu_ids, field='menu_ids', existing_ids=None):
+    """
+    差量更新角色权限：一次 id__in 校验请求的菜单，bulk_create 新增项，一条 DELETE 删除移除项，需在事务中调用
+    existing_ids 为 None 时锁定角色行后读取现有权限（并发分配串行执行），新建角色可传入空元组
+    存在无效菜单 id 时抛出 ValidationError，返回 (新增数, 删除数)
+    """
+    if not isinstance(menu_ids, (list, tuple)):
+        raise ValidationError({field: ['应为菜单 id 列表']})
+    try:
+        requested = {int(menu_id) for menu_id in menu_ids}
+    except (TypeError, ValueError):
+        raise ValidationError({field: ['菜单 id 应为整数']})
+    valid = set(Menu.objects.filter(id__in=requested).order_by().values_list('id', flat=True)) if requested else set()
+    missing = requested - valid
+    if missing:
+        raise ValidationError({field: [f'菜单不存在: {sorted(missing)}']})
+
+    if existing_ids is None:
+        Role.objects.select_for_update().get(pk=role.pk)
+        existing_ids = RolePermission.objects.filter(role=role).values_list('menu_id', flat=True)
+    existing = set(existing_ids)
+    added, removed = requested - existing, existing - requested
+    if removed:
+        RolePermission.objects.filter(role=role, menu_id__in=removed).delete()
+    if added:
+        RolePermission.objects.bulk_create(
+            [RolePermission(role=role, menu_id=menu_id) for menu_id in sorted(added)], batch_size=1000
+        )
+    if added or removed:
+        # bulk_create 不触发信号，手动失效按钮权限、用户菜单与角色缓存（事务提交后生效）
+        permission_cache.invalidate()
+        user_menu_cache.invalidate()
+        role_cache.invalidate()
+        invalidate_count(RolePermission)
+    return len(added), len(removed)
+
+
 class RoleSerializer(CustomModelSerializer):
     """角色序列化器"""
     permissions = serializers.PrimaryKeyRelatedField(
@@ -51,17 +92,14 @@ class RoleViewSet(CustomModelViewSet):
 
     @action(detail=True, methods=['post'])
     def assign_permissions(self, request, pk=None):
-        """分配角色权限"""
+        """分配角色权限（与现有权限求差集，只写入变化部分）"""
         role = self.get_object()
         menu_ids = request.data.get('menu_ids', [])
 
-        # 清除原有权限
-        role.permissions.clear()
-
-        # 添加新权限
-        for menu_id in menu_ids:
-            menu = get_object_or_404(Menu, id=menu_id)
-            RolePermission.objects.create(role=role, menu=menu)
+        with transaction.atomic(using=router.db_for_write(RolePermission)):
+            set_role_permissions(role, menu_ids)
+        # 重新查询，序列化最新的权限
+        role = self.get_queryset().get(pk=role.pk)
 
         serializer = self.get_serializer(role)
         return Response(serializer.data)
@@ -71,30 +109,13 @@ class RoleViewSet(CustomModelViewSet):
         data = request.data.copy()
         permissions = data.pop('permissions', [])  # 提取权限列表
 
-        # 创建角色（不包含权限）
+        # 创建角色与权限关联在同一事务中，权限校验失败时角色一并回滚
         serializer = self.get_serializer(data=data)
         serializer.is_valid(raise_exception=True)
-        role = serializer.save()
-
-        # 处理权限关联（可根据需求自定义）
-        if permissions:
-            try:
-                # 验证权限ID是否存在
-                valid_permissions = Menu.objects.filter(id__in=permissions)
-
-                # 创建中间表记录（如果需要保存额外字段）
-                for menu in valid_permissions:
-                    RolePermission.objects.create(
-                        role=role,
-                        menu=menu,
-                    )
-            except Exception as e:
-                # 如果关联失败，删除已创建的角色
-                role.delete()
-                return Response(
-                    {'error': f'权限关联失败: {str(e)}'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
+        with transaction.atomic(using=router.db_for_write(Role)):
+            role = serializer.save()
+            if permissions:
+                set_role_permissions(role, permissions, field='permissions', existing_ids=())
 
         return self._build_response(
             data=serializer.data,
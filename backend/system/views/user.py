@@ -1,8 +1,6 @@
-import requests
 from django.db.models import Prefetch, F
 from django.utils import timezone
 from rest_framework import serializers
-from rest_framework.authtoken.models import Token
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.response import Response
 from rest_framework.views import APIView
@@ -10,8 +8,12 @@ from django.contrib.auth.hashers import make_password
 from rest_framework.permissions import IsAuthenticated
 from django_filters import rest_framework as filters
 
-from system.models import User, Menu, LoginLog, Dept
+from system.login_log_writer import record_login
+from system.model_caches import menu_cache, role_cache
+from system.models import User, DeptClosure
+from utils.authentication import issue_token, revoke_token
 from utils.ip_utils import get_client_ip
+from utils.permissions import get_user_permission_codes, get_user_role_ids
 
 from utils.serializers import CustomModelSerializer
 from utils.custom_model_viewSet import CustomModelViewSet
@@ -23,30 +25,28 @@ class UserSerializer(CustomModelSerializer):
     """
     用户数据 序列化器
     """
+    field_dependencies = {'roles': ['role'], 'depts': ['dept']}
+
     class Meta:
         model = User
         fields = '__all__'
         read_only_fields = ['id', 'create_time', 'update_time']
+        # 密码哈希只写不读，列表、导出均不返回
+        extra_kwargs = {'password': {'write_only': True}}
 
     def get_roles(self, obj):
         """
         返回用户所有角色的名称列表
         """
-        return list(obj.role.values_list('name', flat=True))
+        return self.get_related_values(obj, 'role', 'name')
 
     def get_depts(self, obj):
         # 返回所有部门名称列表
-        return list(obj.dept.values_list('name', flat=True))
-
-    def create(self, validated_data):
-        if 'password' in validated_data:
-            validated_data['password'] = make_password(validated_data['password'])
-        return super().create(validated_data)
+        return self.get_related_values(obj, 'dept', 'name')
 
-    def update(self, instance, validated_data):
-        if 'password' in validated_data:
-            validated_data['password'] = make_password(validated_data['password'])
-        return super().update(instance, validated_data)
+    def validate_password(self, value):
+        # 在校验阶段加密密码，单条与批量创建、更新共用
+        return make_password(value)
 
 
 class UserLogin(ObtainAuthToken):
@@ -56,28 +56,17 @@ class UserLogin(ObtainAuthToken):
                                            context={'request': request})
         serializer.is_valid(raise_exception=True)
         user = serializer.validated_data['user']
-        token, created = Token.objects.get_or_create(user=user)
+        token = issue_token(user)
         
         # 获取真实IP地址
         client_ip = get_client_ip(request)
 
-        # 获取IP地址的地理位置信息
-        location_info = self.get_location_from_ip(client_ip)
-        # location_info = ''
-
-        # 更新登录IP和登录时间
+        # 登录IP和登录时间随登录日志异步批量写入，这里只更新返回数据
         user.login_ip = client_ip
         user.last_login = timezone.now()
-        user.save(update_fields=['login_ip', 'last_login'])
         user_data = UserSerializer(user).data
-        # 记录登录日志
-        LoginLog.objects.create(
-            username=user.username,
-            result=LoginLog.LoginResult.SUCCESS,
-            user_ip=client_ip,
-            location=location_info,
-            user_agent=request.META.get('HTTP_USER_AGENT', '')
-        )
+        # 记录登录日志（入队，由 Celery 批量落库，归属地落库后异步解析）
+        record_login(user, client_ip, request.META.get('HTTP_USER_AGENT', ''))
         # 在序列化后的数据中加入 accessToken
         user_data['accessToken'] = token.key
         return Response({
@@ -87,34 +76,6 @@ class UserLogin(ObtainAuthToken):
             "message": "ok"
         })
 
-    def get_location_from_ip(self, ip):
-        """根据IP地址获取地理位置信息"""
-        try:
-            # 对于本地IP地址，返回默认值
-            if ip in ['127.0.0.1', 'localhost']:
-                return "本地网络"
-
-            # 查询IP地址信息
-            # 免费接口，无需密钥，返回JSON格式数据
-            url = f"http://ip-api.com/json/{ip}?lang=zh-CN"  # lang=zh-CN 确保返回中文
-            try:
-                response = requests.get(url, timeout=5)
-                data = response.json()
-                if data["status"] == "success":  # 接口返回成功
-                    # 构建地区信息字符串
-                    location_parts = [data["city"], data["regionName"],data["country"]]
-                    return ', '.join(location_parts) if location_parts else "未知位置"
-                else:
-                    return f"IP {ip} 查询失败：{data['message']}"
-            except Exception as e:
-                return f"IP {ip} 连接错误：{str(e)}"
-        except Exception as e:
-            # 记录错误日志
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.error(f"获取IP地址位置信息失败: {str(e)}")
-            return "位置获取失败"
-
 class UserInfo(APIView):
 
     def get(self, request, *args, **kwargs):
@@ -123,11 +84,13 @@ class UserInfo(APIView):
         if user.is_superuser:
             roles = ['admin']
             # menus = Menu.objects.filter(pid__isnull=True).order_by('sort')
-            permissions = Menu.objects.filter(type='button').order_by('auth_code').values_list('auth_code', flat=True)
+            permissions = menu_cache.filter('button_auth_codes')
         else:
-            roles = user.get_role_name
+            # 角色与按钮权限均走缓存，不查询数据库
+            role_ids = get_user_role_ids(user)
+            roles = [role.name for role in role_cache.get_many(role_ids).values()]
             # menus = Menu.objects.filter(pid__isnull=True, role__users=user).order_by('sort').distinct()
-            permissions = Menu.objects.filter(type='button', role__users=user).order_by('auth_code').distinct().values_list('auth_code', flat=True)
+            permissions = sorted(get_user_permission_codes(user))
         # menus_data = MenuSerializer(menus, many=True).data
         user_data['roles'] = roles
         user_data['permissions'] = permissions
@@ -169,39 +132,36 @@ class UserFilter(filters.FilterSet):
     def filter_dept(self, queryset, name, value):
         # value 可能是单个id或逗号分隔的多个id
         dept_ids = [int(i) for i in value.split(',') if i]
-        all_ids = set()
-        for dept_id in dept_ids:
-            all_ids.update(get_dept_and_children_ids(dept_id))
-        return queryset.filter(dept__in=all_ids)
+        return queryset.filter(dept__in=DeptClosure.descendant_ids(dept_ids)).distinct()
 
 def get_dept_and_children_ids(dept_id):
-    # 递归查找所有子部门id
-    ids = [dept_id]
-    children = Dept.objects.filter(pid_id=dept_id)
-    for child in children:
-        ids.extend(get_dept_and_children_ids(child.id))
-    return ids
+    # 通过闭包表一次查出本部门及所有子部门id
+    return list(DeptClosure.objects.filter(ancestor_id=dept_id).values_list('descendant_id', flat=True))
 
 class UserViewSet(CustomModelViewSet):
     """
     用户数据 视图集
     """
-    queryset = User.objects.filter(is_deleted=False).order_by('-id').prefetch_related('role', 'dept', 'post')
+    queryset = User.objects.filter(is_deleted=False).order_by('-id').prefetch_related(
+        'role', 'dept', 'post', 'groups', 'user_permissions'
+    )
     serializer_class = UserSerializer
     read_only_fields = ['id', 'create_time', 'update_time', 'login_ip']
     filterset_class = UserFilter
     search_fields = ['username', 'nickname', 'mobile']  # 支持模糊搜索
     ordering_fields = ['create_time', 'id']
     ordering = ['-create_time']
+    # 导入时按用户名存在则更新
+    import_unique_fields = ('username',)
 
 
 class Logout(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request, *args, **kwargs):
-        # user = request.user
         # 删除用户的Token
-        # Token.objects.filter(user=user).delete()
+        if request.auth is not None:
+            revoke_token(request.auth.key)
         return Response({
             "code": 0,
             "data": None,
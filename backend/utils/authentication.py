@@ -1,7 +1,137 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework import exceptions
 from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+logger = logging.getLogger(__name__)
+
+# token -> (user_id, 最后落库续期的时间戳) 的缓存 key 前缀
+TOKEN_CACHE_PREFIX = 'auth_token:'
+# user_id -> 用户快照 的缓存 key 前缀
+USER_CACHE_PREFIX = 'auth_user:'
+
+
+def get_token_expire_seconds():
+    return getattr(settings, 'TOKEN_EXPIRE_SECONDS', 7 * 24 * 3600)
+
+
+def token_cache_key(key):
+    return f'{TOKEN_CACHE_PREFIX}{key}'
+
+
+def user_cache_key(user_id):
+    return f'{USER_CACHE_PREFIX}{user_id}'
+
+
+def _cache(method, *args):
+    """调用缓存，Redis 不可用时记录日志并按未命中处理（返回 None），认证回退到数据库"""
+    try:
+        return getattr(cache, method)(*args)
+    except Exception as e:
+        logger.warning(f"Token 缓存 {method} 失败: {e}")
+        return None
+
+
+def is_token_expired(token):
+    """Token.created 作为最后续期时间使用"""
+    return token.created < timezone.now() - timedelta(seconds=get_token_expire_seconds())
+
+
+def cache_token(token, user=None):
+    """写入 token 及用户快照缓存"""
+    expire = get_token_expire_seconds()
+    _cache('set', token_cache_key(token.key), (token.user_id, token.created.timestamp()), expire)
+    if user is not None:
+        _cache('set', user_cache_key(user.pk), user, expire)
+
+
+def issue_token(user):
+    """签发 Token：已有且未过期则复用并续期，过期则重新生成"""
+    token, created = Token.objects.get_or_create(user=user)
+    if not created:
+        if is_token_expired(token):
+            revoke_token(token.key)
+            token = Token.objects.create(user=user)
+        else:
+            token.created = timezone.now()
+            Token.objects.filter(key=token.key).update(created=token.created)
+    cache_token(token)
+    return token
+
+
+def revoke_token(key):
+    """注销 Token，同时清理缓存"""
+    _cache('delete', token_cache_key(key))
+    Token.objects.filter(key=key).delete()
+
+
+def invalidate_user_snapshot(user_id):
+    _cache('delete', user_cache_key(user_id))
+
+
+class ExpiringTokenAuthentication(TokenAuthentication):
+    """
+    基于 Redis 缓存的 Token 认证
+    - token -> 用户快照 存 Redis，带过期时间，每次访问滑动续期
+    - 缓存未命中时回源 authtoken_token 表
+    - 超过 TOKEN_EXPIRE_SECONDS 未使用的 Token 视为过期并删除
+    - 缓存命中时 Token.created 距上次落库超过有效期一半才写库，定时清理不会误删仍在使用的 Token
+    """
+
+    def authenticate_credentials(self, key):
+        expire = get_token_expire_seconds()
+        cached = _cache('get', token_cache_key(key))
+        if not isinstance(cached, tuple):
+            return self._authenticate_from_db(key)
+        user_id, renewed_at = cached
+
+        user = _cache('get', user_cache_key(user_id))
+        if user is None:
+            user = get_user_model().objects.filter(pk=user_id).first()
+            if user is None:
+                revoke_token(key)
+                raise exceptions.AuthenticationFailed('User inactive or deleted.')
+            _cache('set', user_cache_key(user_id), user, expire)
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+
+        # 滑动续期
+        now = timezone.now()
+        if now.timestamp() - renewed_at > expire / 2:
+            Token.objects.filter(key=key).update(created=now)
+            _cache('set', token_cache_key(key), (user_id, now.timestamp()), expire)
+        else:
+            _cache('touch', token_cache_key(key), expire)
+        _cache('touch', user_cache_key(user_id), expire)
+        return user, Token(key=key, user_id=user_id)
+
+    def _authenticate_from_db(self, key):
+        try:
+            token = Token.objects.select_related('user').get(key=key)
+        except Token.DoesNotExist:
+            raise exceptions.AuthenticationFailed('Invalid token.')
+
+        if is_token_expired(token):
+            token.delete()
+            raise exceptions.AuthenticationFailed('Token has expired.')
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+
+        # 回源后续期，并把最后续期时间落库，保证缓存丢失后仍按滑动过期计算
+        token.created = timezone.now()
+        Token.objects.filter(key=key).update(created=token.created)
+        cache_token(token, token.user)
+        return token.user, token
+
 
-class BearerTokenAuthentication(TokenAuthentication):
+class BearerTokenAuthentication(ExpiringTokenAuthentication):
     """
     使用 'Bearer' 前缀的 Token 认证
     """
-    keyword = 'Bearer'
\ No newline at end of file
+    keyword = 'Bearer'
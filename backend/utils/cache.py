@@ -0,0 +1,147 @@
+"""
+@Remark: 两级缓存（进程内 LRU + Redis）与基于版本号的失效工具
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import cache
+from django.db import transaction
+
+# 版本号在 Redis 中的 key 前缀
+VERSION_KEY_PREFIX = 'cache_version:'
+
+_MISSING = object()
+
+
+def _version_key(namespace):
+    return f'{VERSION_KEY_PREFIX}{namespace}'
+
+
+def get_version(namespace):
+    """获取命名空间当前版本号，不存在时以毫秒时间戳初始化，避免被淘汰后与旧版本号冲突"""
+    key = _version_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(namespace):
+    """版本号自增，旧版本下的所有缓存随之失效"""
+    key = _version_key(namespace)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = int(time.time() * 1000)
+        cache.set(key, version, timeout=None)
+        return version
+
+
+def bump_version_on_commit(namespace):
+    """
+    在事务提交后再自增版本号，防止提交前重建缓存读到旧数据
+    同一事务内对同一命名空间的多次调用只自增一次（批量写入时避免大量 Redis 往返）
+    """
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        bump_version(namespace)
+        return
+    # 以当前事务的 on_commit 回调列表作为事务标识，提交/回滚后列表会被替换
+    hooks, pending = getattr(connection, '_pending_version_bumps', (None, None))
+    if hooks is not connection.run_on_commit:
+        pending = set()
+        connection._pending_version_bumps = (connection.run_on_commit, pending)
+    if namespace in pending:
+        return
+    pending.add(namespace)
+    transaction.on_commit(lambda: bump_version(namespace))
+
+
+class LocalCache:
+    """
+    进程内 LRU 缓存，带过期时间
+    """
+
+    def __init__(self, maxsize=1024, timeout=60):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                return default
+            expire_at, value = item
+            if expire_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.timeout, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class VersionedCache:
+    """
+    按命名空间版本号失效的两级缓存
+    读取顺序：进程内缓存 -> Redis -> builder 重新计算
+    """
+
+    def __init__(self, namespace, timeout=3600, local_timeout=60, local_maxsize=1024):
+        self.namespace = namespace
+        self.timeout = timeout
+        self.local = LocalCache(maxsize=local_maxsize, timeout=local_timeout)
+
+    def make_key(self, key, version=None):
+        if version is None:
+            version = get_version(self.namespace)
+        return f'{self.namespace}:{version}:{key}'
+
+    def get(self, key, default=None):
+        full_key = self.make_key(key)
+        value = self.local.get(full_key, _MISSING)
+        if value is not _MISSING:
+            return value
+        value = cache.get(full_key, _MISSING)
+        if value is _MISSING:
+            return default
+        self.local.set(full_key, value)
+        return value
+
+    def set(self, key, value):
+        full_key = self.make_key(key)
+        cache.set(full_key, value, self.timeout)
+        self.local.set(full_key, value)
+
+    def get_or_set(self, key, builder):
+        full_key = self.make_key(key)
+        value = self.local.get(full_key, _MISSING)
+        if value is not _MISSING:
+            return value
+        value = cache.get(full_key, _MISSING)
+        if value is _MISSING:
+            value = builder()
+            cache.set(full_key, value, self.timeout)
+        self.local.set(full_key, value)
+        return value
+
+    def invalidate(self):
+        """事务提交后自增版本号"""
+        bump_version_on_commit(self.namespace)
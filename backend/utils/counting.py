@@ -0,0 +1,99 @@
+"""
+@Remark: 分页总数统计策略（精确 / 缓存 / 估算 / 不统计）
+"""
+import hashlib
+
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.db import connections, router
+from django.db.models.signals import post_save, post_delete
+
+from utils.cache import get_version, bump_version_on_commit
+
+# 精确总数缓存时间（秒）
+COUNT_CACHE_TIMEOUT = 30
+# information_schema 估算值缓存时间（秒）
+ESTIMATE_CACHE_TIMEOUT = 300
+# 估算行数低于该值时仍做精确统计（小表 COUNT 很快，估算误差却很大）
+ESTIMATE_THRESHOLD = 100000
+
+
+class CountStrategy:
+    EXACT = 'exact'        # 每次 COUNT(*)
+    CACHED = 'cached'      # 按 (模型, 查询 SQL) 缓存 COUNT(*)，模型变更时失效
+    ESTIMATE = 'estimate'  # 无过滤条件时使用 MySQL 行数估算，有过滤条件时同 CACHED
+    NONE = 'none'          # 不统计总数
+
+
+def count_namespace(model):
+    return f'count:{model._meta.label_lower}'
+
+
+def get_cached_count(queryset, timeout=COUNT_CACHE_TIMEOUT):
+    """缓存精确总数，查询 SQL 即规范化后的过滤条件"""
+    try:
+        sql = str(queryset.query)
+    except EmptyResultSet:
+        return 0
+    namespace = count_namespace(queryset.model)
+    digest = hashlib.md5(sql.encode()).hexdigest()
+    key = f'{namespace}:{get_version(namespace)}:{digest}'
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, timeout)
+    return count
+
+
+def estimate_cache_key(model):
+    return f'count_estimate:{model._meta.label_lower}'
+
+
+def get_estimated_count(model):
+    """读取 MySQL information_schema 中的表行数估算，非 MySQL 返回 None"""
+    connection = connections[router.db_for_read(model)]
+    if connection.vendor != 'mysql':
+        return None
+    key = estimate_cache_key(model)
+    estimate = cache.get(key)
+    if estimate is None:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT TABLE_ROWS FROM information_schema.TABLES "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+                [model._meta.db_table]
+            )
+            row = cursor.fetchone()
+        estimate = int(row[0]) if row and row[0] is not None else 0
+        cache.set(key, estimate, ESTIMATE_CACHE_TIMEOUT)
+    return estimate
+
+
+def get_total(queryset, strategy=CountStrategy.EXACT, filtered=True):
+    """
+    按策略获取总数
+    返回 (total, exact)，exact 为 False 表示估算值
+    """
+    if strategy == CountStrategy.ESTIMATE and not filtered:
+        estimate = get_estimated_count(queryset.model)
+        if estimate is not None and estimate >= ESTIMATE_THRESHOLD:
+            return estimate, False
+    if strategy in (CountStrategy.CACHED, CountStrategy.ESTIMATE):
+        return get_cached_count(queryset), True
+    return queryset.count(), True
+
+
+def invalidate_count_cache(sender, **kwargs):
+    bump_version_on_commit(count_namespace(sender))
+
+
+def register_count_cache(model):
+    """缓存总数的模型（cached / estimate 策略）在变更时失效缓存，由 CustomModelViewSet 定义子类时注册"""
+    uid = f'count_cache:{model._meta.label_lower}'
+    post_save.connect(invalidate_count_cache, sender=model, dispatch_uid=uid)
+    post_delete.connect(invalidate_count_cache, sender=model, dispatch_uid=uid)
+
+
+def invalidate_count(model):
+    """bulk_create / QuerySet.update / delete 等不触发信号的批量操作后手动调用"""
+    bump_version_on_commit(count_namespace(model))
@@ -1,5 +1,28 @@
+import functools
+import operator
+import uuid
+
+from django.core.files.storage import default_storage
+from django.db import router, transaction
+from django.db.models import Q, prefetch_related_objects
+from django.db.models.signals import post_save
+from django.utils import timezone
 from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.response import Response
+from rest_framework.serializers import IntegerField, ListField, ModelSerializer
+
+from utils.counting import CountStrategy, invalidate_count, register_count_cache
+from utils.export import export_response
+from utils.importer import (
+    add_import_error, get_file_format, get_import_progress, iter_batches, iter_records, new_import_report,
+    set_import_progress,
+)
+from utils.serializers import CustomModelSerializer
+from utils.sparse_fields import apply_sparse_fieldset
+from utils.streaming import DEFAULT_CHUNK_SIZE, iter_serialized_chunks, streaming_json_response
+from utils.values_serializer import compile_values_plan
 
 
 class CustomModelViewSet(viewsets.ModelViewSet):
@@ -19,6 +42,40 @@ class CustomModelViewSet(viewsets.ModelViewSet):
     soft_delete_field = 'is_deleted'
     # 是否支持软删除
     enable_soft_delete = False
+    # 分页模式：'page' 页码分页；'cursor' 按 ordering 字段做游标（keyset）分页
+    pagination_mode = 'page'
+    # 分页总数统计策略，见 utils.counting.CountStrategy：exact / cached / estimate / none
+    count_strategy = 'exact'
+    # 不分页时的流式输出格式：None 不流式；'json' 标准响应结构的流式 JSON；'ndjson' 每行一条记录
+    # 也可通过 ?_stream=json / ?_stream=ndjson 按请求开启
+    stream_format = None
+    stream_query_param = '_stream'
+    stream_chunk_size = DEFAULT_CHUNK_SIZE
+    # 列表数据批量创建时是否走 bulk_create，以及每批写入行数
+    bulk_create_enabled = True
+    bulk_create_batch_size = 500
+    # 批量更新时是否走集合式写入，以及每批写入行数
+    bulk_update_enabled = True
+    bulk_update_batch_size = 500
+    # 导出文件格式参数（xlsx / csv），以及每批序列化的行数
+    export_format_param = '_format'
+    export_chunk_size = DEFAULT_CHUNK_SIZE
+    # 导出时始终排除的字段（凭据类），即使序列化器把它们声明为可读
+    export_exclude_fields = ('password',)
+    # 导入：每批校验、写入的行数；按哪些唯一字段“存在则更新”（为空时只新增）；
+    # 超过 import_async_size 字节的文件交给 Celery 异步导入
+    import_batch_size = 500
+    import_unique_fields = ()
+    import_async_size = 1024 * 1024
+    # 列表/流式/导出是否尝试基于 .values() 的快速序列化，无法编译的序列化器自动回退
+    use_values_serializer = False
+    values_plan = None
+
+    def __init_subclass__(cls, **kwargs):
+        """缓存总数的视图集为其模型注册变更失效"""
+        super().__init_subclass__(**kwargs)
+        if cls.count_strategy in (CountStrategy.CACHED, CountStrategy.ESTIMATE) and cls.queryset is not None:
+            register_count_cache(cls.queryset.model)
 
     def get_required_permission(self):
         # 约定：system:menu:create
@@ -26,16 +83,9 @@ class CustomModelViewSet(viewsets.ModelViewSet):
         model_name = self.queryset.model._meta.model_name
         action = self.action  # 'create', 'update', 'destroy', 'list', 'retrieve'
         # 只对增删改查等操作做权限控制
-        action_map = {
-            'create': 'create',
-            'update': 'edit',
-            'partial_update': 'edit',
-            'destroy': 'delete',
-            'list': 'query',
-            'retrieve': 'query',
-        }
-        if action in action_map:
-            perm_action = action_map[action]
+        from utils.permissions import ACTION_PERMISSION_MAP
+        if action in ACTION_PERMISSION_MAP:
+            perm_action = ACTION_PERMISSION_MAP[action]
         else:
             perm_action = action  # 如 sync、import、export
         return f"{app_label}:{model_name}:{perm_action}"
@@ -66,23 +116,67 @@ class CustomModelViewSet(viewsets.ModelViewSet):
         # 应用软删除过滤
         if self.enable_soft_delete:
             queryset = queryset.filter(**{self.soft_delete_field: False})
+        # 过滤前的基础查询集，分页统计总数时据此判断请求是否带过滤条件
+        self.base_queryset = queryset
         # 应用搜索和过滤
         queryset = self.filter_queryset(queryset)
+        queryset = self.optimize_list_queryset(queryset)
 
-        # 判断是否传了 page 参数
-        if 'page' in request.query_params:
+        # 判断是否传了 page 参数，或使用游标分页
+        paginator = self.paginator
+        if 'page' in request.query_params or (paginator is not None and paginator.is_cursor_mode(request, self)):
             page = self.paginate_queryset(queryset)
             if page is not None:
-                serializer = self.get_serializer(page, many=True)
-                return self.get_paginated_response(serializer.data)
+                return self.get_paginated_response(self.serialize_list(page))
         # 没有 page 参数，返回全部数据
-        serializer = self.get_serializer(queryset, many=True)
+        stream_format = self.get_stream_format(request)
+        if stream_format:
+            return self.stream_list(queryset, stream_format)
         return self._build_response(
-            data=serializer.data,
+            data=self.serialize_list(queryset),
             message="ok",
             status=status.HTTP_200_OK
         )
 
+    def optimize_list_queryset(self, queryset):
+        """列表类查询的投影优化：序列化器可编译时改用 .values()，否则按 _fields/_exclude 下推 only()"""
+        self.values_plan = self.get_values_plan(queryset.model)
+        if self.values_plan is None:
+            return self.apply_sparse_fieldset(queryset)
+        lookups = list(self.values_plan.lookups)
+        paginator = self.paginator
+        if paginator is not None and hasattr(paginator, 'get_ordering'):
+            # 游标分页需要从行中读取排序字段
+            lookups += [field.lstrip('-') for field in paginator.get_ordering(queryset)]
+        return queryset.prefetch_related(None).values(*dict.fromkeys(lookups))
+
+    def get_values_plan(self, model):
+        if not self.use_values_serializer:
+            return None
+        return compile_values_plan(self.get_serializer(many=True).child, model)
+
+    def serialize_list(self, rows):
+        """序列化一页/一批数据，已编译 values 计划时直接转换 values 行"""
+        if self.values_plan is not None:
+            return self.values_plan.serialize(rows)
+        return self.get_serializer(rows, many=True).data
+
+    def apply_sparse_fieldset(self, queryset):
+        """传了 _fields/_exclude 时只查询输出字段依赖的列，并去掉不再需要的关联预加载"""
+        params = self.request.query_params
+        if not (params.get('_fields') or params.get('_exclude')):
+            return queryset
+        return apply_sparse_fieldset(queryset, self.get_serializer(many=True).child)
+
+    def get_stream_format(self, request):
+        stream_format = request.query_params.get(self.stream_query_param) or self.stream_format
+        return stream_format if stream_format in ('json', 'ndjson') else None
+
+    def stream_list(self, queryset, stream_format='json'):
+        """按批次迭代查询集并逐块序列化输出，峰值内存只与 stream_chunk_size 相关"""
+        rows_chunks = iter_serialized_chunks(queryset, self.serialize_list, self.stream_chunk_size)
+        return streaming_json_response(rows_chunks, stream_format)
+
     def retrieve(self, request, *args, **kwargs):
         """重写详情视图，支持软删除检查"""
         instance = self.get_object()
@@ -110,7 +204,10 @@ class CustomModelViewSet(viewsets.ModelViewSet):
             serializer = self.get_serializer(data=request.data)
 
         serializer.is_valid(raise_exception=True)
-        self.perform_create(serializer)
+        if is_many:
+            self.perform_bulk_create(serializer)
+        else:
+            self.perform_create(serializer)
 
         return self._build_response(
             data=serializer.data,
@@ -118,6 +215,108 @@ class CustomModelViewSet(viewsets.ModelViewSet):
             status=status.HTTP_200_OK,
         )
 
+    def can_bulk_create(self, serializer):
+        """自定义了 create 的序列化器（嵌套写入、额外处理等）不能绕过 create 批量写入"""
+        child = getattr(serializer, 'child', None)
+        return (
+            self.bulk_create_enabled
+            and isinstance(child, ModelSerializer)
+            and type(child).create in (ModelSerializer.create, CustomModelSerializer.create)
+        )
+
+    def perform_bulk_create(self, serializer):
+        """
+        批量创建：整批校验后一次填充审计字段，在一个事务内 bulk_create 分批写入，
+        多对多关系随后批量写入中间表，并为每个对象补发 post_save 以维持信号维护的缓存
+        数据库不支持 bulk_create 返回主键时（如 MySQL），按 LAST_INSERT_ID() 推算每批的自增主键；
+        无法推算时在一个事务内逐条创建，保证返回的 id 与信号中的主键有效
+        """
+        if not self.can_bulk_create(serializer):
+            return self.perform_create(serializer)
+        child = serializer.child
+        model = child.Meta.model
+        using = router.db_for_write(model)
+        returns_pk = transaction.get_connection(using).features.can_return_rows_from_bulk_insert
+        pk_step = None if returns_pk else self.get_bulk_insert_pk_step(model, using)
+        if not returns_pk and pk_step is None:
+            with transaction.atomic(using=using):
+                return self.perform_create(serializer)
+
+        audit_fields = {}
+        if hasattr(child, 'set_audit_user_fields'):
+            child.set_audit_user_fields(audit_fields, is_create=True)
+
+        m2m_names = {field.name for field in model._meta.many_to_many}
+        objs, relations = [], []
+        for attrs in serializer.validated_data:
+            attrs = {**attrs, **audit_fields}
+            relations.append({name: attrs.pop(name) for name in list(attrs) if name in m2m_names})
+            objs.append(model(**attrs))
+        if not returns_pk and any(obj.pk is not None for obj in objs):
+            # 显式指定了主键的行会拆成多条 INSERT，无法按批推算主键
+            with transaction.atomic(using=using):
+                return self.perform_create(serializer)
+
+        with transaction.atomic(using=using):
+            if returns_pk:
+                objs = model.objects.using(using).bulk_create(objs, batch_size=self.bulk_create_batch_size)
+            else:
+                self.bulk_insert_with_pks(model, objs, using, pk_step)
+            self.bulk_set_m2m(model, objs, relations, using)
+            for obj in objs:
+                post_save.send(model, instance=obj, created=True, update_fields=None, raw=False, using=using)
+        invalidate_count(model)
+        if m2m_names:
+            # 响应序列化多对多字段时不再逐行查询
+            prefetch_related_objects(objs, *m2m_names)
+        serializer.instance = objs
+
+    @staticmethod
+    def get_bulk_insert_pk_step(model, using):
+        """
+        MySQL 的 innodb_autoinc_lock_mode 为 0/1 时，一条多行 INSERT 分配的自增主键连续（间隔 auto_increment_increment），
+        返回该间隔；其他数据库、非自增主键或 lock_mode 为 2（并发插入可能交错）时返回 None
+        """
+        connection = transaction.get_connection(using)
+        if connection.vendor != 'mysql' or model._meta.auto_field is None:
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT @@innodb_autoinc_lock_mode, @@auto_increment_increment")
+            lock_mode, increment = cursor.fetchone()
+        return int(increment) if int(lock_mode) in (0, 1) else None
+
+    @staticmethod
+    def get_first_insert_id(connection, count):
+        """同一连接上一条多行 INSERT 分配的第一个自增主键（MySQL 的 LAST_INSERT_ID() 即为第一行）"""
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT LAST_INSERT_ID()")
+            return cursor.fetchone()[0]
+
+    def bulk_insert_with_pks(self, model, objs, using, pk_step):
+        """逐批 bulk_create（每批一条 INSERT），按该批第一个自增主键与步长回填主键"""
+        connection = transaction.get_connection(using)
+        batch_size = self.bulk_create_batch_size
+        for start in range(0, len(objs), batch_size):
+            batch = objs[start:start + batch_size]
+            model.objects.using(using).bulk_create(batch)
+            first_id = self.get_first_insert_id(connection, len(batch))
+            for index, obj in enumerate(batch):
+                obj.pk = first_id + index * pk_step
+
+    def bulk_set_m2m(self, model, objs, relations, using):
+        """按字段汇总多对多关系，每个中间表一次 bulk_create"""
+        for field in model._meta.many_to_many:
+            through = field.remote_field.through
+            source = field.m2m_field_name()
+            target = field.m2m_reverse_field_name()
+            links = [
+                through(**{f'{source}_id': obj.pk, f'{target}_id': getattr(item, 'pk', item)})
+                for obj, related in zip(objs, relations)
+                for item in related.get(field.name, [])
+            ]
+            if links:
+                through.objects.using(using).bulk_create(links, batch_size=self.bulk_create_batch_size, ignore_conflicts=True)
+
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
         self.perform_destroy(instance)
@@ -143,6 +342,338 @@ class CustomModelViewSet(viewsets.ModelViewSet):
             status=status.HTTP_200_OK,
         )
 
+    def get_audit_update_fields(self, model):
+        """批量写入时统一填充的修改人、修改时间"""
+        field_names = {field.name for field in model._meta.concrete_fields}
+        values = {}
+        if 'modifier' in field_names:
+            values['modifier'] = getattr(self.request.user, 'username', None)
+        if 'update_time' in field_names:
+            values['update_time'] = timezone.now()
+        return values
+
+    @staticmethod
+    def _send_post_save(model, objs, update_fields, using):
+        """集合式更新不触发信号，补发 post_save 以维持信号维护的缓存"""
+        for obj in objs:
+            post_save.send(model, instance=obj, created=False, update_fields=update_fields, raw=False, using=using)
+
+    def get_bulk_queryset(self):
+        """批量更新/删除的查询范围，树形视图集的 queryset 只含根节点时需覆盖"""
+        queryset = self.get_queryset()
+        if self.enable_soft_delete:
+            queryset = queryset.filter(**{self.soft_delete_field: False})
+        return queryset
+
+    def can_bulk_update(self, serializer):
+        """自定义了 update 的序列化器不能绕过 update 批量写入"""
+        return (
+            self.bulk_update_enabled
+            and isinstance(serializer, ModelSerializer)
+            and type(serializer).update in (ModelSerializer.update, CustomModelSerializer.update)
+        )
+
+    @action(detail=False, methods=['post'], url_path='bulk_update')
+    def bulk_update(self, request, *args, **kwargs):
+        """
+        批量更新，请求体为 [{id, ...fields}]
+        逐条校验后按相同取值分组：同值的一组用一条 QuerySet.update()，其余用 bulk_update()
+        """
+        items = request.data
+        if not isinstance(items, list) or not all(isinstance(item, dict) and item.get('id') for item in items):
+            raise ValidationError('请求体应为包含 id 的对象列表')
+        ids = _validate_ids([item['id'] for item in items], 'id')
+        queryset = self.get_bulk_queryset()
+        model = queryset.model
+        instances = queryset.in_bulk(ids)
+        missing = [pk for pk in ids if pk not in instances]
+        if missing:
+            raise ValidationError({'id': [f'数据不存在: {missing}']})
+
+        serializers = []
+        for pk, item in zip(ids, items):
+            instance = instances[pk]
+            serializer = self.get_serializer(instance, data=item, partial=True)
+            serializer.is_valid(raise_exception=True)
+            serializers.append(serializer)
+
+        using = router.db_for_write(model)
+        with transaction.atomic(using=using):
+            if serializers and not self.can_bulk_update(serializers[0]):
+                for serializer in serializers:
+                    self.perform_update(serializer)
+            else:
+                self.perform_bulk_update(model, serializers, using)
+        invalidate_count(model)
+        return self._build_response(data={'count': len(serializers)}, message="ok")
+
+    def perform_bulk_update(self, model, serializers, using):
+        audit_values = self.get_audit_update_fields(model)
+        m2m_names = {field.name for field in model._meta.many_to_many}
+        groups = {}
+        rows = []
+        for serializer in serializers:
+            values = {k: v for k, v in serializer.validated_data.items() if k not in m2m_names}
+            for name, value in values.items():
+                setattr(serializer.instance, name, value)
+            for name, value in audit_values.items():
+                setattr(serializer.instance, name, value)
+            for name in m2m_names & serializer.validated_data.keys():
+                getattr(serializer.instance, name).set(serializer.validated_data[name])
+            try:
+                key = tuple(sorted(values.items()))
+                hash(key)
+            except TypeError:
+                rows.append((serializer.instance, values))
+                continue
+            groups.setdefault(key, []).append(serializer.instance)
+
+        for key, objs in groups.items():
+            if len(objs) == 1:
+                rows.append((objs[0], dict(key)))
+                continue
+            fields = {**dict(key), **audit_values}
+            model.objects.using(using).filter(pk__in=[obj.pk for obj in objs]).update(**fields)
+            self._send_post_save(model, objs, set(fields), using)
+
+        by_fields = {}
+        for obj, values in rows:
+            by_fields.setdefault(frozenset(values) | frozenset(audit_values), []).append(obj)
+        for fields, objs in by_fields.items():
+            if fields:
+                model.objects.using(using).bulk_update(objs, list(fields), batch_size=self.bulk_update_batch_size)
+                self._send_post_save(model, objs, set(fields), using)
+
+    @action(detail=False, methods=['post'], url_path='bulk_delete')
+    def bulk_delete(self, request, *args, **kwargs):
+        """
+        批量删除，请求体为 {"ids": [...]} 或 [...]
+        enable_soft_delete 时一条 UPDATE 标记软删除，否则集合式硬删除
+        """
+        ids = request.data.get('ids') if isinstance(request.data, dict) else request.data
+        ids = _validate_ids(ids, 'ids')
+        queryset = self.get_bulk_queryset().filter(pk__in=ids)
+        model = queryset.model
+        using = router.db_for_write(model)
+        with transaction.atomic(using=using):
+            if self.enable_soft_delete:
+                fields = {self.soft_delete_field: True, **self.get_audit_update_fields(model)}
+                objs = list(queryset.only('pk'))
+                count = model.objects.using(using).filter(pk__in=[obj.pk for obj in objs]).update(**fields)
+                self._send_post_save(model, objs, set(fields), using)
+            else:
+                # 先取出主键列表（MySQL 不允许 DELETE 的子查询引用同一张表），
+                # QuerySet.delete 仍会处理级联并发送 post_delete 信号
+                pks = list(queryset.values_list('pk', flat=True))
+                count = model.objects.using(using).filter(pk__in=pks).delete()[0]
+        invalidate_count(model)
+        return self._build_response(data={'count': count}, message="ok")
+
+    def get_export_columns(self, serializer):
+        """导出列：列表序列化器的可读字段（已应用 _fields/_exclude 与脱敏，排除 export_exclude_fields），表头取字段 label"""
+        return [
+            (name, str(field.label or name))
+            for name, field in serializer.child.fields.items()
+            if not field.write_only and name not in self.export_exclude_fields
+        ]
+
+    @action(detail=False, methods=['get'])
+    def export(self, request, *args, **kwargs):
+        """
+        导出当前过滤、排序条件下的全部数据，?_format=xlsx（默认）或 csv
+        按 export_chunk_size 分批迭代查询集并序列化，内存占用与导出行数无关
+        """
+        file_format = request.query_params.get(self.export_format_param) or 'xlsx'
+        if file_format not in ('xlsx', 'csv'):
+            raise ValidationError({self.export_format_param: ['仅支持 xlsx、csv']})
+        queryset = self.get_queryset()
+        if self.enable_soft_delete:
+            queryset = queryset.filter(**{self.soft_delete_field: False})
+        queryset = self.optimize_list_queryset(self.filter_queryset(queryset))
+        columns = self.get_export_columns(self.get_serializer([], many=True))
+        rows_chunks = iter_serialized_chunks(queryset, self.serialize_list, self.export_chunk_size)
+        return export_response(columns, rows_chunks, queryset.model._meta.model_name, file_format)
+
+    def get_import_fields(self):
+        """可导入的列：{表头: (字段名, 字段)}，表头可用字段名或 label（与导出表头一致）"""
+        fields = {}
+        for name, field in self.get_serializer().fields.items():
+            if field.read_only:
+                continue
+            fields[name] = (name, field)
+            if field.label:
+                fields.setdefault(str(field.label), (name, field))
+        return fields
+
+    @action(detail=False, methods=['post'], url_path='import', url_name='import')
+    def import_data(self, request, *args, **kwargs):
+        """
+        导入 xlsx / csv（表单字段 file），首行为表头
+        小文件同步导入并返回逐行错误报告；大文件转存后交给 Celery，返回 task_id 供 import_status 轮询
+        """
+        file = request.FILES.get('file')
+        if file is None:
+            raise ValidationError({'file': ['请上传文件']})
+        file_format = get_file_format(file.name)
+        if file.size > self.import_async_size:
+            from system.tasks import import_data_task
+            file_name = default_storage.save(f'imports/{uuid.uuid4().hex}.{file_format}', file)
+            task_id = uuid.uuid4().hex
+            set_import_progress(task_id, {'status': 'pending', 'user_id': request.user.pk, **new_import_report()})
+            viewset_path = f'{type(self).__module__}.{type(self).__qualname__}'
+            import_data_task.apply_async(
+                args=(viewset_path, request.user.pk, file_name, file_format), task_id=task_id
+            )
+            return self._build_response(data={'task_id': task_id, 'status': 'pending'}, message="ok")
+        return self._build_response(data=self.run_import(file, file_format), message="ok")
+
+    @action(detail=False, methods=['get'])
+    def import_status(self, request, *args, **kwargs):
+        """查询异步导入进度，?task_id="""
+        progress = get_import_progress(request.query_params.get('task_id'))
+        if not progress or progress.get('user_id') != request.user.pk:
+            raise NotFound('导入任务不存在')
+        return self._build_response(data=progress, message="ok")
+
+    def run_import(self, file, file_format, on_batch=None):
+        """流式解析文件并按 import_batch_size 分批校验、写入，每批一个事务"""
+        report = new_import_report()
+        records = iter_records(file, file_format, self.get_import_fields())
+        for batch in iter_batches(records, self.import_batch_size):
+            self.import_batch(batch, report)
+            if on_batch is not None:
+                on_batch(report)
+        return report
+
+    def get_import_existing(self, batch):
+        """按 import_unique_fields 一次查出本批已存在的数据（含已软删除的行），返回 {唯一键: 实例}"""
+        unique_fields = self.import_unique_fields
+        keys = {self.import_key(record) for _, record in batch}
+        keys.discard(None)
+        if not unique_fields or not keys:
+            return {}
+        if len(unique_fields) == 1:
+            condition = Q(**{f'{unique_fields[0]}__in': [key[0] for key in keys]})
+        else:
+            condition = functools.reduce(operator.or_, (Q(**dict(zip(unique_fields, key))) for key in keys))
+        queryset = self.queryset.model._default_manager.filter(condition)
+        return {
+            tuple(str(getattr(instance, name)) for name in unique_fields): instance
+            for instance in queryset
+        }
+
+    def import_key(self, record):
+        if not self.import_unique_fields:
+            return None
+        if any(record.get(name) in (None, '') for name in self.import_unique_fields):
+            return None
+        return tuple(str(record[name]) for name in self.import_unique_fields)
+
+    def import_batch(self, batch, report):
+        """整批查出已存在数据后逐行校验（已存在的行按部分更新校验），合法行集合式写入"""
+        existing = self.get_import_existing(batch)
+        valid, seen, updated = [], set(), 0
+        for row_number, record in batch:
+            report['total'] += 1
+            key = self.import_key(record)
+            if key is not None and key in seen:
+                add_import_error(report, row_number, {'non_field_errors': ['与文件中前面的行重复']})
+                continue
+            instance = existing.get(key)
+            serializer = self.get_serializer(instance, data=record, partial=instance is not None)
+            if not serializer.is_valid():
+                add_import_error(report, row_number, serializer.errors)
+                continue
+            if key is not None:
+                seen.add(key)
+            if instance is not None and getattr(instance, self.soft_delete_field, False):
+                # 唯一键命中已软删除的行（数据库唯一约束仍在）：恢复该行并按文件内容更新，计为新增
+                serializer.validated_data[self.soft_delete_field] = False
+            elif instance is not None:
+                updated += 1
+            valid.append(serializer)
+        if not valid:
+            return
+        model = self.queryset.model
+        using = router.db_for_write(model)
+        with transaction.atomic(using=using):
+            if self.can_bulk_import(valid[0], model, using):
+                self.perform_bulk_import(model, valid, using)
+            else:
+                for serializer in valid:
+                    serializer.save()
+        invalidate_count(model)
+        report['updated'] += updated
+        report['created'] += len(valid) - updated
+
+    def can_bulk_import(self, serializer, model, using):
+        """自定义了 create/update 的序列化器逐行保存；数据库无法返回主键且没有唯一字段可回查时也逐行保存"""
+        serializer_class = type(serializer)
+        if not (
+            self.bulk_create_enabled
+            and serializer_class.create in (ModelSerializer.create, CustomModelSerializer.create)
+            and serializer_class.update in (ModelSerializer.update, CustomModelSerializer.update)
+        ):
+            return False
+        if self.import_unique_fields:
+            return True
+        return transaction.get_connection(using).features.can_return_rows_from_bulk_insert
+
+    def perform_bulk_import(self, model, serializers, using):
+        """
+        一次 bulk_create 写入整批：设置了 import_unique_fields 时用 update_conflicts 做
+        “存在则更新”，只更新文件中出现的列；多对多关系按行整体替换
+        """
+        create_audit = {}
+        if hasattr(serializers[0], 'set_audit_user_fields'):
+            serializers[0].set_audit_user_fields(create_audit, is_create=True)
+        update_audit = self.get_audit_update_fields(model)
+        m2m_names = {field.name for field in model._meta.many_to_many}
+        unique_fields = list(self.import_unique_fields)
+        objs, relations, created, update_fields = [], [], [], set(update_audit)
+        for serializer in serializers:
+            attrs = dict(serializer.validated_data)
+            relations.append({name: attrs.pop(name) for name in list(attrs) if name in m2m_names})
+            created.append(serializer.instance is None)
+            if serializer.instance is None:
+                obj = model(**{**attrs, **create_audit})
+            else:
+                # 已存在的行按当前值新建对象（不改动查出的实例）并覆盖文件中的列，通过唯一字段冲突走更新分支
+                current = {
+                    field.attname: getattr(serializer.instance, field.attname)
+                    for field in model._meta.concrete_fields if not field.primary_key
+                }
+                obj = model(**current)
+                for name, value in {**attrs, **update_audit}.items():
+                    setattr(obj, name, value)
+                update_fields.update(attrs)
+            objs.append(obj)
+
+        options = {}
+        if unique_fields:
+            update_fields = update_fields.difference(unique_fields, create_audit)
+            update_fields.discard(model._meta.pk.name)
+            options = {'update_conflicts': True, 'update_fields': sorted(update_fields) or unique_fields}
+            if transaction.get_connection(using).features.supports_update_conflicts_with_target:
+                options['unique_fields'] = unique_fields
+        objs = model.objects.using(using).bulk_create(objs, batch_size=self.bulk_create_batch_size, **options)
+
+        if unique_fields and any(obj.pk is None for obj in objs):
+            # 数据库未返回主键（如 MySQL 的 upsert），按唯一字段回查一次
+            saved = self.get_import_existing([(None, {name: getattr(obj, name) for name in unique_fields}) for obj in objs])
+            for obj in objs:
+                obj.pk = getattr(saved.get(tuple(str(getattr(obj, name)) for name in unique_fields)), 'pk', None)
+        saved = [(obj, related) for obj, related in zip(objs, relations) if obj.pk is not None]
+        for field in model._meta.many_to_many:
+            replaced = [obj.pk for obj, related in saved if field.name in related]
+            if replaced:
+                through = field.remote_field.through
+                through.objects.using(using).filter(**{f'{field.m2m_field_name()}_id__in': replaced}).delete()
+        if saved:
+            self.bulk_set_m2m(model, *zip(*saved), using)
+        for obj, is_created in zip(objs, created):
+            post_save.send(model, instance=obj, created=is_created, update_fields=None, raw=False, using=using)
+
     def _build_response(self, code=0, message="成功", data=None, status=status.HTTP_200_OK):
         """
         构建标准化API响应格式
@@ -172,3 +703,11 @@ class CustomModelViewSet(viewsets.ModelViewSet):
             status=status,
             content_type="application/json"
         )
+
+
+def _validate_ids(ids, field):
+    """请求中的 id 列表须为非空整数列表，否则返回 400"""
+    try:
+        return ListField(child=IntegerField(), allow_empty=False).run_validation(ids)
+    except ValidationError as e:
+        raise ValidationError({field: e.detail})
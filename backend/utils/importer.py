@@ -0,0 +1,156 @@
+"""
+@Remark: 数据导入工具，流式解析 xlsx / csv，按批次产出记录，并记录异步导入进度
+"""
+import codecs
+import csv
+import datetime
+import os
+
+from django.core.cache import cache
+from openpyxl import load_workbook
+from rest_framework.exceptions import ValidationError
+from rest_framework.relations import ManyRelatedField
+from rest_framework.serializers import ListField
+
+from utils.export import FORMULA_PREFIXES
+
+# 支持的导入文件格式
+IMPORT_FORMATS = ('xlsx', 'csv')
+# 导入报告中最多保留的错误行数
+MAX_IMPORT_ERRORS = 1000
+# 异步导入进度缓存
+IMPORT_PROGRESS_PREFIX = 'import_progress:'
+IMPORT_PROGRESS_TIMEOUT = 24 * 3600
+
+
+def get_file_format(filename):
+    file_format = os.path.splitext(filename or '')[1].lstrip('.').lower()
+    if file_format not in IMPORT_FORMATS:
+        raise ValidationError({'file': ['仅支持 xlsx、csv 文件']})
+    return file_format
+
+
+def iter_rows(file, file_format):
+    """逐行读取单元格值；xlsx 使用 openpyxl 只读模式，不把整个工作簿载入内存"""
+    if file_format == 'csv':
+        # utf-8-sig 兼容导出文件带的 BOM
+        yield from csv.reader(codecs.iterdecode(file, 'utf-8-sig'))
+        return
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        yield from workbook.worksheets[0].iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def clean_cell(value, field=None):
+    """把单元格值还原成序列化器可接收的输入，空单元格返回 None"""
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        # Excel 中的整数读出来是 1.0
+        value = int(value)
+    elif isinstance(value, datetime.datetime):
+        value = value.strftime('%Y-%m-%d %H:%M:%S')
+    many = isinstance(field, (ManyRelatedField, ListField))
+    if not isinstance(value, str):
+        if not many:
+            return value
+        value = str(value)
+    value = value.strip()
+    if value == '':
+        return None
+    # 还原导出时为防公式注入添加的前缀
+    if value.startswith("'") and value[1:].startswith(FORMULA_PREFIXES):
+        value = value[1:]
+    if many:
+        return [item.strip() for item in value.split(',') if item.strip()]
+    return value
+
+
+def iter_records(file, file_format, fields):
+    """
+    以首行为表头，产出 (行号, 数据字典)
+    fields 为 {表头: (字段名, 序列化器字段)}，表头可以是字段名或字段 label；未识别的列与空行被忽略
+    """
+    rows = iter_rows(file, file_format)
+    header = next(rows, None)
+    if not header:
+        raise ValidationError({'file': ['文件为空']})
+    columns = [fields.get(str(title).strip()) if title is not None else None for title in header]
+    if not any(columns):
+        raise ValidationError({'file': ['未识别到可导入的列']})
+    for row_number, row in enumerate(rows, start=2):
+        record = {}
+        for column, value in zip(columns, row):
+            if column is None:
+                continue
+            name, field = column
+            value = clean_cell(value, field)
+            if value is not None:
+                record[name] = value
+        if record:
+            yield row_number, record
+
+
+def iter_batches(records, size):
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def new_import_report():
+    return {'total': 0, 'created': 0, 'updated': 0, 'failed': 0, 'errors': []}
+
+
+def add_import_error(report, row_number, errors):
+    report['failed'] += 1
+    if len(report['errors']) < MAX_IMPORT_ERRORS:
+        report['errors'].append({'row': row_number, 'errors': errors})
+
+
+def get_import_progress(task_id):
+    return cache.get(f'{IMPORT_PROGRESS_PREFIX}{task_id}')
+
+
+def set_import_progress(task_id, progress):
+    cache.set(f'{IMPORT_PROGRESS_PREFIX}{task_id}', progress, IMPORT_PROGRESS_TIMEOUT)
+
+
+def run_import_task(task_id, viewset_path, user_id, file_name, file_format):
+    """Celery 任务中以上传用户身份执行视图集的导入，逐批记录进度，结束后删除暂存文件"""
+    from django.contrib.auth import get_user_model
+    from django.core.files.storage import default_storage
+    from django.http import HttpRequest
+    from django.utils.module_loading import import_string
+    from rest_framework.request import Request
+
+    progress = {'status': 'running', 'user_id': user_id, **new_import_report()}
+    set_import_progress(task_id, progress)
+    try:
+        request = Request(HttpRequest())
+        request.user = get_user_model().objects.get(pk=user_id)
+        view = import_string(viewset_path)(
+            request=request, action='import_data', format_kwarg=None, args=(), kwargs={}
+        )
+
+        def on_batch(report):
+            progress.update(report)
+            set_import_progress(task_id, progress)
+
+        with default_storage.open(file_name, 'rb') as file:
+            report = view.run_import(file, file_format, on_batch=on_batch)
+        progress.update(report, status='success')
+        set_import_progress(task_id, progress)
+        return {key: report[key] for key in ('total', 'created', 'updated', 'failed')}
+    except Exception as e:
+        progress.update(status='failed', message=str(getattr(e, 'detail', e)))
+        set_import_progress(task_id, progress)
+        raise
+    finally:
+        default_storage.delete(file_name)
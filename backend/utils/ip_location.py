@@ -0,0 +1,173 @@
+"""
+@Remark: 离线 IP 归属地查询，基于按起始地址排序的 IPv4 区间表（mmap + bisect），带进程内 LRU 缓存
+
+区间表文件格式（小端序）：
+    头部    MAGIC(8) + 区间数 N(uint32) + 地名数 M(uint32)
+    区间    starts[N] ends[N] location_ids[N]（uint32）
+    地名    offsets[M + 1]（uint32，相对地名区起点）+ UTF-8 地名
+由 manage.py build_ip_location_table 从 CSV 生成
+"""
+import ipaddress
+import mmap
+import os
+import struct
+import sys
+import logging
+import threading
+from bisect import bisect_right
+from functools import lru_cache
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'IPLOC\x00\x01\x00'
+HEADER = struct.Struct('<8sII')
+
+LOCAL_LOCATION = '本地网络'
+PRIVATE_LOCATION = '内网地址'
+UNKNOWN_LOCATION = '未知位置'
+
+# 进程内缓存的 IP 数量
+IP_LOCATION_CACHE_SIZE = 10000
+
+
+def get_table_path():
+    return getattr(settings, 'IP_LOCATION_DB', None) or os.path.join(settings.BASE_DIR, 'data', 'ip_location.dat')
+
+
+class IPRangeTable:
+    """只读区间表，整个文件以 mmap 映射，多进程共享页缓存"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, location_count = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f'{path} 不是有效的 IP 区间表文件')
+        view = memoryview(self._mmap)
+        offset = HEADER.size
+        self.starts = self._uint32_array(view, offset, count)
+        self.ends = self._uint32_array(view, offset + 4 * count, count)
+        self.location_ids = self._uint32_array(view, offset + 8 * count, count)
+        offset += 12 * count
+        self.location_offsets = self._uint32_array(view, offset, location_count + 1)
+        self.location_base = offset + 4 * (location_count + 1)
+        self._view = view
+
+    @staticmethod
+    def _uint32_array(view, offset, count):
+        data = view[offset:offset + 4 * count]
+        if sys.byteorder == 'little':
+            return data.cast('I')
+        # 大端机器上复制一份转换字节序
+        return list(struct.unpack(f'<{count}I', data))
+
+    def __len__(self):
+        return len(self.starts)
+
+    def location(self, location_id):
+        start = self.location_base + self.location_offsets[location_id]
+        end = self.location_base + self.location_offsets[location_id + 1]
+        return bytes(self._view[start:end]).decode('utf-8')
+
+    def lookup(self, ip_int):
+        index = bisect_right(self.starts, ip_int) - 1
+        if index < 0 or self.ends[index] < ip_int:
+            return None
+        return self.location(self.location_ids[index])
+
+
+def write_table(ranges, path):
+    """
+    写出区间表，ranges 为 [(start, end, location)]
+    按起始地址排序，合并相邻且地名相同的区间，重叠部分以先出现的区间为准
+    返回写入的区间数
+    """
+    merged = []
+    for start, end, location in sorted(ranges, key=lambda item: item[0]):
+        if merged and start <= merged[-1][1]:
+            start = merged[-1][1] + 1
+            if start > end:
+                continue
+        if merged and merged[-1][2] == location and merged[-1][1] + 1 == start:
+            merged[-1][1] = end
+        else:
+            merged.append([start, end, location])
+
+    # 地名去重，编号按首次出现顺序分配
+    location_ids = {}
+    for item in merged:
+        item[2] = location_ids.setdefault(item[2], len(location_ids))
+    names = [name.encode('utf-8') for name in location_ids]
+    offsets, position = [], 0
+    for name in names:
+        offsets.append(position)
+        position += len(name)
+    offsets.append(position)
+
+    count = len(merged)
+    tmp_path = f'{path}.tmp'
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, count, len(names)))
+        f.write(struct.pack(f'<{count}I', *(item[0] for item in merged)))
+        f.write(struct.pack(f'<{count}I', *(item[1] for item in merged)))
+        f.write(struct.pack(f'<{count}I', *(item[2] for item in merged)))
+        f.write(struct.pack(f'<{len(offsets)}I', *offsets))
+        f.write(b''.join(names))
+    # 原子替换，运行中的进程继续使用旧文件映射
+    os.replace(tmp_path, path)
+    return count
+
+
+_table = None
+_table_lock = threading.Lock()
+
+
+def get_table():
+    """懒加载区间表，文件不存在时返回 None"""
+    global _table
+    if _table is None:
+        with _table_lock:
+            if _table is None:
+                path = get_table_path()
+                if not os.path.exists(path):
+                    return None
+                try:
+                    _table = IPRangeTable(path)
+                except (OSError, ValueError, struct.error) as e:
+                    logger.error(f"加载 IP 区间表失败: {e}")
+                    return None
+    return _table
+
+
+def reload_table():
+    """区间表更新后重新加载并清空缓存"""
+    global _table
+    with _table_lock:
+        _table = None
+    get_ip_location.cache_clear()
+
+
+@lru_cache(maxsize=IP_LOCATION_CACHE_SIZE)
+def get_ip_location(ip):
+    """查询 IP 归属地：回环地址、内网/保留地址直接返回，公网 IPv4 查区间表"""
+    if not ip or ip == 'localhost':
+        return LOCAL_LOCATION if ip else UNKNOWN_LOCATION
+    try:
+        address = ipaddress.ip_address(ip)
+    except ValueError:
+        return UNKNOWN_LOCATION
+    if address.version == 6 and address.ipv4_mapped:
+        address = address.ipv4_mapped
+    if address.is_loopback:
+        return LOCAL_LOCATION
+    if not address.is_global:
+        return PRIVATE_LOCATION
+    if address.version != 4:
+        return UNKNOWN_LOCATION
+    table = get_table()
+    if table is None:
+        return UNKNOWN_LOCATION
+    return table.lookup(int(address)) or UNKNOWN_LOCATION
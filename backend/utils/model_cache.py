@@ -0,0 +1,127 @@
+"""
+@Remark: 读多写少模型的通用读穿透缓存（进程内 LRU + Redis），按模型版本号失效
+
+    menu_cache = ModelCache(Menu, querysets={'buttons': lambda qs: qs.filter(type='button')})
+    menu_cache.get(pk)            # 同 Menu.objects.get(pk=pk)，不存在时抛出 Menu.DoesNotExist
+    menu_cache.get_many([1, 2])   # {pk: 实例}，缺失的主键不出现在结果中
+    menu_cache.filter('buttons')  # 白名单查询集的结果列表
+
+模型（及 depends_on 中的模型）post_save / post_delete、多对多 m2m_changed 时在事务提交后自增 Redis 中的版本号，
+各进程的本地缓存以版本号为 key 前缀，随之全部失效
+返回的实例为缓存对象的浅拷贝，调用方修改字段不会影响缓存；写操作仍应从数据库读取后再保存
+"""
+import copy
+
+from django.core.cache import cache
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from utils.cache import _MISSING, VersionedCache, get_version
+
+# 已注册的模型缓存，model -> ModelCache
+model_caches = {}
+
+
+def get_model_cache(model):
+    return model_caches.get(model)
+
+
+def _copy(value):
+    if isinstance(value, list):
+        return [copy.copy(item) for item in value]
+    return copy.copy(value)
+
+
+class ModelCache:
+
+    def __init__(self, model, querysets=None, select_related=(), depends_on=(),
+                 timeout=3600, local_timeout=60, local_maxsize=1024):
+        """
+        querysets：白名单查询，name -> callable(queryset, *args)，返回查询集（结果整体缓存）
+        select_related：get / get_many 一并加载的外键，外键模型需要加入 depends_on
+        depends_on：这些模型变更时同样失效
+        """
+        self.model = model
+        self.querysets = querysets or {}
+        self.select_related = select_related
+        self.cache = VersionedCache(
+            f'model:{model._meta.label_lower}', timeout=timeout,
+            local_timeout=local_timeout, local_maxsize=local_maxsize,
+        )
+        self._connect(depends_on)
+        model_caches[model] = self
+
+    def _connect(self, depends_on):
+        label = self.model._meta.label_lower
+        for sender in (self.model, *depends_on):
+            uid = f'model_cache:{label}:{sender._meta.label_lower}'
+            post_save.connect(self._on_change, sender=sender, weak=False, dispatch_uid=uid)
+            post_delete.connect(self._on_change, sender=sender, weak=False, dispatch_uid=uid)
+        for field in self.model._meta.many_to_many:
+            through = field.remote_field.through
+            m2m_changed.connect(
+                self._on_m2m_change, sender=through, weak=False,
+                dispatch_uid=f'model_cache:{label}:{field.name}',
+            )
+
+    def _on_change(self, sender, **kwargs):
+        self.invalidate()
+
+    def _on_m2m_change(self, sender, action, **kwargs):
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            self.invalidate()
+
+    def invalidate(self):
+        """QuerySet.update / bulk_create 等不触发信号的批量写入后手动调用"""
+        self.cache.invalidate()
+
+    def get_queryset(self):
+        queryset = self.model._default_manager.all()
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        return queryset
+
+    def _normalize_pk(self, pk):
+        return self.model._meta.pk.to_python(pk)
+
+    def get(self, pk):
+        pk = self._normalize_pk(pk)
+        obj = self.cache.get_or_set(f'pk:{pk}', lambda: self.get_queryset().filter(pk=pk).first())
+        if obj is None:
+            raise self.model.DoesNotExist(f'{self.model._meta.object_name} matching pk={pk} does not exist.')
+        return _copy(obj)
+
+    def get_many(self, pks):
+        """按主键批量读取：进程内缓存 -> Redis get_many -> 一次 in_bulk 查询"""
+        pks = list(dict.fromkeys(self._normalize_pk(pk) for pk in pks))
+        version = get_version(self.cache.namespace)
+        keys = {pk: self.cache.make_key(f'pk:{pk}', version) for pk in pks}
+        result, missing = {}, []
+        for pk, key in keys.items():
+            value = self.cache.local.get(key, _MISSING)
+            if value is _MISSING:
+                missing.append(pk)
+            elif value is not None:
+                result[pk] = value
+        if missing:
+            cached = cache.get_many([keys[pk] for pk in missing])
+            loaded = {}
+            for pk in missing:
+                if keys[pk] in cached:
+                    loaded[pk] = cached[keys[pk]]
+            absent = [pk for pk in missing if pk not in loaded]
+            if absent:
+                found = self.get_queryset().in_bulk(absent)
+                fresh = {pk: found.get(pk) for pk in absent}
+                cache.set_many({keys[pk]: value for pk, value in fresh.items()}, self.cache.timeout)
+                loaded.update(fresh)
+            for pk, value in loaded.items():
+                self.cache.local.set(keys[pk], value)
+                if value is not None:
+                    result[pk] = value
+        return {pk: copy.copy(result[pk]) for pk in pks if pk in result}
+
+    def filter(self, name, *args):
+        """执行白名单查询，结果按 (name, args) 缓存"""
+        build = self.querysets[name]
+        key = f"qs:{name}:{':'.join(map(str, args))}"
+        return _copy(self.cache.get_or_set(key, lambda: list(build(self.model._default_manager.all(), *args))))
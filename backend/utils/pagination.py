@@ -1,19 +1,49 @@
 # -*- coding: utf-8 -*-
+import base64
+import datetime
+import json
 from collections import OrderedDict
+from functools import reduce
 
 from django.core import paginator
 from django.core.paginator import Paginator as DjangoPaginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+
+from utils.counting import CountStrategy, get_total
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 from django.core.paginator import InvalidPage
 
 
+class CursorJSONEncoder(DjangoJSONEncoder):
+    """游标编码：时间保留完整微秒精度，保证相等比较准确"""
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
 class CustomPagination(PageNumberPagination):
     page_size = 20
     page_query_param = 'page'  # 默认就是'page'，如果你用别的名字要改成对应的
     page_size_query_param = "pageSize"
     max_page_size = 999
     django_paginator_class = DjangoPaginator
+    # 游标分页参数，传入即启用游标分页（首页传空值）
+    cursor_query_param = 'cursor'
+
+    def is_cursor_mode(self, request, view=None):
+        """
+        是否使用游标（keyset）分页：
+        - 请求携带 cursor 参数
+        - 或视图集设置 pagination_mode = 'cursor'
+        """
+        if self.cursor_query_param in request.query_params:
+            return True
+        return getattr(view, 'pagination_mode', None) == 'cursor'
 
     def paginate_queryset(self, queryset, request, view=None):
         """
@@ -22,12 +52,23 @@ class CustomPagination(PageNumberPagination):
         page_size = self.get_page_size(request)
         if not page_size:
             return None
+        self.cursor_mode = self.is_cursor_mode(request, view)
+        if self.cursor_mode:
+            self.request = request
+            return self.paginate_queryset_by_cursor(queryset, request, page_size)
+        count_strategy = getattr(view, 'count_strategy', CountStrategy.EXACT)
+        if count_strategy != CountStrategy.EXACT:
+            self.request = request
+            return self.paginate_queryset_by_strategy(queryset, request, page_size, count_strategy, view)
         paginator = self.django_paginator_class(queryset, page_size)
         page_number = self.get_page_number(request, paginator)
         try:
             self.page = paginator.page(page_number)
         except InvalidPage as exc:
             self.page = []
+        self.total = paginator.count if self.page else 0
+        self.total_exact = True
+        self.has_next = None
 
         if paginator.num_pages > 1 and self.template is not None:
             # The browsable API should display pagination controls.
@@ -36,14 +77,142 @@ class CustomPagination(PageNumberPagination):
         self.request = request
         return list(self.page)
 
+    def is_filtered(self, queryset, view=None):
+        """
+        查询集是否在视图集基础查询集之外带有过滤/搜索条件
+        基础查询集自带的条件（如 is_deleted=False）不算过滤，无法取得基础查询集时按是否有 WHERE 判断
+        """
+        base = getattr(view, 'base_queryset', None)
+        if base is None:
+            return bool(queryset.query.where)
+        return queryset.query.where != base.query.where
+
+    def paginate_queryset_by_strategy(self, queryset, request, page_size, count_strategy, view=None):
+        """
+        按统计策略分页，不经过 Django Paginator 的精确 COUNT：
+        - cached/estimate：总数走缓存或 MySQL 行数估算
+        - none：不统计总数，多取一行判断是否有下一页
+        """
+        try:
+            page_number = max(int(request.query_params.get(self.page_query_param, 1)), 1)
+        except (TypeError, ValueError):
+            page_number = 1
+        offset = (page_number - 1) * page_size
+
+        if count_strategy == CountStrategy.NONE:
+            rows = list(queryset[offset:offset + page_size + 1])
+            self.has_next = len(rows) > page_size
+            self.page = rows[:page_size]
+            self.total, self.total_exact = None, False
+            return self.page
+
+        self.total, self.total_exact = get_total(queryset, count_strategy, self.is_filtered(queryset, view))
+        if self.total_exact and offset >= self.total:
+            self.page = []
+        else:
+            self.page = list(queryset[offset:offset + page_size])
+        self.has_next = offset + len(self.page) < self.total
+        if not self.page and self.total_exact:
+            self.total = 0
+        return self.page
+
+    def get_ordering(self, queryset):
+        """取查询集当前排序字段，并追加主键保证排序唯一"""
+        ordering = [
+            field for field in (queryset.query.order_by or queryset.model._meta.ordering)
+            if isinstance(field, str) and field.lstrip('-') not in ('?', '')
+        ]
+        pk_names = ('pk', 'id', queryset.model._meta.pk.name)
+        if not any(field.lstrip('-') in pk_names for field in ordering):
+            ordering.append('-pk' if ordering and ordering[-1].startswith('-') else 'pk')
+        return ordering
+
+    @staticmethod
+    def _get_field_value(obj, field):
+        if isinstance(obj, dict):
+            # .values() 行
+            return obj.get(field.lstrip('-'))
+        for attr in field.lstrip('-').split('__'):
+            if obj is None:
+                return None
+            obj = getattr(obj, attr)
+        return obj
+
+    def encode_cursor(self, obj, ordering, reverse=False):
+        values = [self._get_field_value(obj, field) for field in ordering]
+        payload = json.dumps({'v': values, 'r': reverse}, cls=CursorJSONEncoder, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def decode_cursor(self, cursor, ordering):
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+            values, reverse = payload['v'], bool(payload['r'])
+        except (TypeError, ValueError, KeyError):
+            raise NotFound('无效的游标')
+        if len(values) != len(ordering):
+            raise NotFound('无效的游标')
+        return values, reverse
+
+    @staticmethod
+    def _seek_condition(ordering, values, reverse):
+        """
+        构造 keyset 条件：(f1 > v1) OR (f1 = v1 AND f2 > v2) OR ...
+        降序字段使用 <，反向翻页时方向整体取反；NULL 按 MySQL 规则视为最小值
+        """
+        conditions = []
+        equals = Q()
+        for field, value in zip(ordering, values):
+            name = field.lstrip('-')
+            forward = field.startswith('-') == reverse
+            if value is None:
+                after = Q(**{f'{name}__isnull': False}) if forward else Q(pk__in=[])
+                same = Q(**{f'{name}__isnull': True})
+            else:
+                after = Q(**{f'{name}__gt' if forward else f'{name}__lt': value})
+                if not forward:
+                    after |= Q(**{f'{name}__isnull': True})
+                same = Q(**{name: value})
+            conditions.append(equals & after)
+            equals &= same
+        return reduce(lambda a, b: a | b, conditions)
+
+    def paginate_queryset_by_cursor(self, queryset, request, page_size):
+        """按排序字段做 keyset 定位，任意页的代价与首页相同，不执行 COUNT 与 OFFSET"""
+        ordering = self.get_ordering(queryset)
+        cursor = request.query_params.get(self.cursor_query_param)
+        reverse = False
+        if cursor:
+            values, reverse = self.decode_cursor(cursor, ordering)
+            queryset = queryset.filter(self._seek_condition(ordering, values, reverse))
+        if reverse:
+            query_ordering = [field[1:] if field.startswith('-') else f'-{field}' for field in ordering]
+        else:
+            query_ordering = ordering
+        rows = list(queryset.order_by(*query_ordering)[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+
+        has_next = has_more if not reverse else True
+        has_previous = bool(cursor) and (has_more if reverse else True)
+        self.next_cursor = self.encode_cursor(rows[-1], ordering) if rows and has_next else None
+        self.previous_cursor = self.encode_cursor(rows[0], ordering, reverse=True) if rows and has_previous else None
+        self.page = rows
+        return rows
+
     def get_paginated_response(self, data):
+        if getattr(self, 'cursor_mode', False):
+            return self.get_cursor_paginated_response(data)
         code = 0
         msg = 'ok'
-        total = self.page.paginator.count if self.page else 0
         res = {
-            "total": total,
+            "total": self.total,
+            "total_exact": self.total_exact,
             "items": data
         }
+        if self.has_next is not None:
+            res['has_next'] = self.has_next
         if not data:
             code = 0
             msg = "暂无数据"
@@ -55,3 +224,16 @@ class CustomPagination(PageNumberPagination):
             ('data', res),
             ('error', None),
         ]))
+
+    def get_cursor_paginated_response(self, data):
+        res = {
+            "items": data,
+            "next": self.next_cursor,
+            "previous": self.previous_cursor,
+        }
+        return Response(OrderedDict([
+            ('code', 0),
+            ('message', 'ok' if data else "暂无数据"),
+            ('data', res),
+            ('error', None),
+        ]))
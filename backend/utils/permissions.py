@@ -1,6 +1,46 @@
 from rest_framework import permissions
 from rest_framework.permissions import BasePermission
 from system.models import Menu
+from utils.cache import VersionedCache
+
+# 视图动作到按钮权限动作的映射，未列出的动作不做按钮权限校验
+ACTION_PERMISSION_MAP = {
+    'create': 'create',
+    'update': 'edit',
+    'partial_update': 'edit',
+    'bulk_update': 'edit',
+    'destroy': 'delete',
+    'bulk_delete': 'delete',
+    'list': 'query',
+    'retrieve': 'query',
+    'export': 'export',
+    'import_data': 'import',
+    'import_status': 'import',
+    'analytics': 'query',
+}
+
+# 用户按钮权限缓存，Role/RolePermission/Menu/User.role 变更时由 system.signals 失效
+permission_cache = VersionedCache('perm', timeout=3600, local_timeout=60)
+
+
+def get_user_permission_codes(user):
+    """获取用户拥有的按钮权限编码集合（两级缓存）"""
+    def build():
+        return frozenset(
+            Menu.objects.filter(type='button', role__users=user)
+            .exclude(auth_code='')
+            .values_list('auth_code', flat=True)
+            .distinct()
+        )
+    return permission_cache.get_or_set(f'user:{user.pk}', build)
+
+
+def get_user_role_ids(user):
+    """获取用户角色 id 列表（升序，两级缓存）"""
+    def build():
+        return sorted(user.role.values_list('id', flat=True))
+    return permission_cache.get_or_set(f'roles:{user.pk}', build)
+
 
 class IsSuperUserOrReadOnly(BasePermission):
     """超级用户可读写，普通用户只读"""
@@ -23,16 +63,8 @@ class HasButtonPermission(BasePermission):
             app_label = view.queryset.model._meta.app_label
             model_name = view.queryset.model._meta.model_name
             action = getattr(view, 'action', None)
-            action_map = {
-                'create': 'create',
-                'update': 'edit',
-                'partial_update': 'edit',
-                'destroy': 'delete',
-                'list': 'query',
-                'retrieve': 'query',
-            }
-            if action in action_map:
-                required_code = f"{app_label}:{model_name}:{action_map[action]}"
+            if action in ACTION_PERMISSION_MAP:
+                required_code = f"{app_label}:{model_name}:{ACTION_PERMISSION_MAP[action]}"
         if not required_code:
             return True  # 不需要按钮权限
         user = request.user
@@ -40,9 +72,4 @@ class HasButtonPermission(BasePermission):
             return False
         if user.is_superuser:
             return True
-        role_ids = user.role.values_list('id', flat=True)
-        return Menu.objects.filter(
-            type='button',
-            role__id__in=role_ids,
-            auth_code=required_code
-        ).exists()
+        return required_code in get_user_permission_codes(user)
@@ -0,0 +1,51 @@
+"""
+@Remark: 基于 orjson 的 JSON 渲染器与解析器
+"""
+import orjson
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+# dict/list 子类（OrderedDict、ReturnDict 等）与 UUID 由 orjson 原生处理；
+# 日期时间交给 DRF 的编码规则（微秒精度、UTC 输出 Z），与原 JSONRenderer 输出保持一致
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+# Decimal、惰性翻译字符串、QuerySet、timedelta 等沿用 DRF JSONEncoder 的转换
+_default = JSONEncoder().default
+
+
+def dumps(data, option=0):
+    """序列化为 UTF-8 bytes，orjson 不支持的数据（如超过 64 位的整数）回退到 DRF 原生 JSONRenderer"""
+    try:
+        content = orjson.dumps(data, default=_default, option=ORJSON_OPTIONS | option)
+    except TypeError:
+        renderer_context = {'indent': 2} if option & orjson.OPT_INDENT_2 else None
+        return JSONRenderer().render(data, renderer_context=renderer_context)
+    # 与 DRF 一致转义 U+2028/U+2029，避免输出被内联进 <script> 时被 JavaScript 当作换行
+    return content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    orjson 渲染器，替代 rest_framework.renderers.JSONRenderer
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        option = orjson.OPT_INDENT_2 if self.get_indent(accepted_media_type, renderer_context or {}) else 0
+        return dumps(data, option)
+
+
+class ORJSONParser(JSONParser):
+    """
+    orjson 解析器，替代 rest_framework.parsers.JSONParser
+    """
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
@@ -1,6 +1,7 @@
 """
 @Remark: 自定义序列化器
 """
+from django.db.models import QuerySet, prefetch_related_objects
 from rest_framework import serializers
 from rest_framework.fields import empty
 from rest_framework.request import Request
@@ -9,6 +10,32 @@ from django.utils.functional import cached_property
 from rest_framework.utils.serializer_helpers import BindingDict
 
 
+def _get_sibling_instances(serializer, obj):
+    """获取与 obj 处于同一次列表序列化中的全部实例（当前页）"""
+    parent = getattr(serializer, 'parent', None)
+    instances = getattr(parent, 'instance', None) if getattr(parent, 'many', False) else None
+    if isinstance(instances, QuerySet):
+        instances = instances._result_cache
+    if not instances:
+        return [obj]
+    instances = list(instances)
+    if not any(instance is obj for instance in instances):
+        return [obj]
+    return instances
+
+
+def get_related_objects(serializer, obj, relation):
+    """
+    读取多对多/反向外键关联对象
+    - 已 prefetch 时直接读取缓存，不再查询
+    - 未 prefetch 时对当前页全部实例批量 prefetch，每个关联只查询一次
+    """
+    prefetched = getattr(obj, '_prefetched_objects_cache', {})
+    if relation not in prefetched:
+        prefetch_related_objects(_get_sibling_instances(serializer, obj), relation)
+    return list(getattr(obj, relation).all())
+
+
 class AuditUserFieldsMixin:
     """
     用于自动赋值 creator 和 modifier 字段的 Mixin
@@ -27,6 +54,25 @@ class AuditUserFieldsMixin:
                 validated_data[self.creator_field_id] = username
 
 
+_MISSING = object()
+
+
+def _resolve_path(obj, parts):
+    """按属性路径取值，路径中任一段不存在或为 None 时返回 None"""
+    for part in parts:
+        obj = getattr(obj, part, _MISSING)
+        if obj is _MISSING:
+            return None
+    return obj
+
+
+def _make_desensitize_method(field_name):
+    def desensitize_method(self, obj):
+        return self._get_desensitized_value(obj, field_name)
+    desensitize_method.__name__ = f"get_{field_name.replace('.', '_')}_desensitized"
+    return desensitize_method
+
+
 class DesensitizationMixin:
     """
     用于敏感字段脱敏的通用 Mixin
@@ -50,49 +96,88 @@ class DesensitizationMixin:
     
     # 脱敏字符，默认使用*
     desensitize_char = '*'
-    
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        # 为每个脱敏字段创建脱敏方法
-        for field_name in self.desensitize_fields:
-            if '.' in field_name:
-                # 处理关联字段，如 'key.api_key'
-                method_name = f'get_{field_name.replace(".", "_")}_desensitized'
-                setattr(self, method_name, self._create_desensitize_method(field_name))
-            else:
-                # 处理直接字段
-                method_name = f'get_{field_name}_desensitized'
-                setattr(self, method_name, self._create_desensitize_method(field_name))
-    
-    def _create_desensitize_method(self, field_name):
-        """创建脱敏方法的闭包"""
-        def desensitize_method(obj):
-            return self._desensitize_field(obj, field_name)
-        return desensitize_method
-    
+
+    # 按类编译的脱敏计划：[(字段名, 输出字段名, 方法名)]，以及 {字段名: 属性路径}
+    _desensitize_plans = ()
+    _desensitize_paths = {}
+
+    def __init_subclass__(cls, **kwargs):
+        """定义子类时编译一次脱敏计划，并在类上生成 get_xxx_desensitized 方法"""
+        super().__init_subclass__(**kwargs)
+        plans, paths = [], {}
+        for field_name in cls.desensitize_fields:
+            field_key = f"{field_name.replace('.', '_')}_desensitized"
+            method_name = f'get_{field_key}'
+            if not hasattr(cls, method_name):
+                setattr(cls, method_name, _make_desensitize_method(field_name))
+            plans.append((field_name, field_key, method_name))
+            paths[field_name] = tuple(field_name.split('.'))
+        cls._desensitize_plans = tuple(plans)
+        cls._desensitize_paths = paths
+
+    def _get_desensitized_value(self, obj, field_name):
+        """
+        列表序列化时首次调用即对当前页整列脱敏，后续行直接读取结果
+        """
+        columns = self.__dict__.setdefault('_desensitized_columns', {})
+        entry = columns.get(field_name, {}).get(id(obj))
+        if entry is None or entry[0] is not obj:
+            instances = _get_sibling_instances(self, obj)
+            values = self._desensitize_column(instances, field_name)
+            columns[field_name] = {id(instance): (instance, value) for instance, value in zip(instances, values)}
+            entry = columns[field_name][id(obj)]
+        return entry[1]
+
+    def _desensitize_column(self, instances, field_name):
+        """对一批实例的同一字段脱敏"""
+        if type(self)._desensitize_field is not DesensitizationMixin._desensitize_field:
+            # 子类自定义了逐条脱敏逻辑
+            return [self._desensitize_field(obj, field_name) for obj in instances]
+        parts = self._get_desensitize_path(field_name)
+        return self.desensitize_values([_resolve_path(obj, parts) for obj in instances])
+
+    def desensitize_values(self, values):
+        """批量脱敏一列值，空值原样返回"""
+        if self._full_value_visible:
+            return values
+        mask = self._apply_desensitization
+        return [value if not value else mask(str(value)) for value in values]
+
+    def get_desensitize_value_transform(self, field_key):
+        """
+        供 .values() 快速序列化使用：返回 (字段路径, 值转换函数或 None)
+        非脱敏字段或自定义了逐条脱敏逻辑时返回 None
+        """
+        if type(self)._desensitize_field is not DesensitizationMixin._desensitize_field:
+            return None
+        for field_name, key, _ in self._desensitize_plans:
+            if key == field_key:
+                break
+        else:
+            return None
+        if self._full_value_visible:
+            return field_name, None
+        mask = self._apply_desensitization
+        return field_name, lambda value: value if not value else mask(str(value))
+
+    def _get_desensitize_path(self, field_name):
+        return self._desensitize_paths.get(field_name) or tuple(field_name.split('.'))
+
+    @cached_property
+    def _full_value_visible(self):
+        """同一序列化器实例只做一次权限判断"""
+        return self._can_view_full_value()
+
     def _desensitize_field(self, obj, field_name):
         """脱敏指定字段"""
-        if '.' in field_name:
-            # 处理关联字段，如 'key.api_key'
-            parts = field_name.split('.')
-            value = obj
-            for part in parts:
-                if hasattr(value, part):
-                    value = getattr(value, part)
-                else:
-                    return None
-        else:
-            # 处理直接字段
-            if not hasattr(obj, field_name):
-                return None
-            value = getattr(obj, field_name)
-        
+        value = _resolve_path(obj, self._get_desensitize_path(field_name))
+
         # 如果值为空，直接返回
         if not value:
             return value
 
         # 检查用户权限
-        if self._can_view_full_value():
+        if self._full_value_visible:
             return value
 
         # 执行脱敏
@@ -127,16 +212,7 @@ class DesensitizationMixin:
 
         is_list = getattr(self.root, 'many', False)
 
-        for field_name in self.desensitize_fields:
-            if '.' in field_name:
-                # 处理关联字段，如 'key.api_key'
-                method_name = f'get_{field_name.replace(".", "_")}_desensitized'
-                field_key = f"{field_name.replace('.', '_')}_desensitized"
-            else:
-                # 处理直接字段
-                method_name = f'get_{field_name}_desensitized'
-                field_key = f"{field_name}_desensitized"
-            
+        for field_name, field_key, method_name in self._desensitize_plans:
             # 创建脱敏字段的 SerializerMethodField
             fields[field_key] = serializers.SerializerMethodField(method_name=method_name)
             
@@ -157,6 +233,9 @@ class CustomModelSerializer(AuditUserFieldsMixin, ModelSerializer):
     # 添加默认时间返回格式
     create_time = serializers.DateTimeField(format="%Y-%m-%d %H:%M:%S", required=False, read_only=True)
     update_time = serializers.DateTimeField(format="%Y-%m-%d %H:%M:%S", required=False)
+    # 方法字段依赖的模型字段/关联，如 {'roles': ['role']}，用于把 _fields 下推到查询
+    # 未声明的方法字段中，xxx_text 视为依赖 xxx 字段，其余视为依赖未知（不做下推）
+    field_dependencies = {}
 
     def __init__(self, instance=None, data=empty, request=None, **kwargs):
         super().__init__(instance, data, **kwargs)
@@ -188,6 +267,10 @@ class CustomModelSerializer(AuditUserFieldsMixin, ModelSerializer):
             return getattr(self.request.user, 'id', None)
         return None
 
+    def get_related_values(self, obj, relation, attr='name'):
+        """读取关联对象的某个属性列表，优先使用 prefetch 缓存"""
+        return [getattr(item, attr) for item in get_related_objects(self, obj, relation)]
+
     @cached_property
     def fields(self):
         fields = BindingDict(self)
@@ -0,0 +1,146 @@
+"""
+@Remark: 稀疏字段下推，把 _fields/_exclude 裁剪后的输出字段换算成 only() 列与需要保留的关联
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+
+def _stock_choice_display(self, obj):
+    return obj.get_FIELD_display()
+
+
+def is_choice_display_method(field, model_field_name):
+    """
+    方法字段的实现是否就是 return obj.get_xxx_display()（与参照函数比较字节码与引用名），
+    方法体做了其他处理时不能按约定推断
+    """
+    method = getattr(field.parent, field.method_name, None)
+    if method is None:
+        return True
+    code = getattr(getattr(method, '__func__', method), '__code__', None)
+    reference = _stock_choice_display.__code__
+    return (
+        code is not None
+        and code.co_argcount == reference.co_argcount
+        and code.co_code == reference.co_code
+        and code.co_names == (f'get_{model_field_name}_display',)
+    )
+
+
+def _infer_method_field_paths(name, field, opts):
+    """约定 xxx_text 方法字段读取 xxx 字段的 choices 显示值（方法体须为标准的 get_xxx_display 调用）"""
+    if not name.endswith('_text'):
+        return None
+    try:
+        model_field = opts.get_field(name[:-len('_text')])
+    except FieldDoesNotExist:
+        return None
+    if not model_field.choices or not is_choice_display_method(field, model_field.name):
+        return None
+    return [model_field.name]
+
+
+def get_sparse_plan(serializer, model):
+    """
+    根据序列化器当前（已裁剪）的输出字段计算 (columns, relations)
+    columns 为需要加载的本表字段，relations 为需要保留的 select_related/prefetch_related 首段
+    存在无法确定依赖的字段（未声明依赖的方法字段、source='*' 等）时返回 None，不做下推
+    """
+    opts = model._meta
+    dependencies = getattr(serializer, 'field_dependencies', {})
+    desensitized = {
+        f"{name.replace('.', '_')}_desensitized": name
+        for name in getattr(serializer, 'desensitize_fields', [])
+    }
+    columns, relations = set(), set()
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if name in dependencies:
+            paths = dependencies[name]
+        elif name in desensitized:
+            paths = [desensitized[name]]
+        elif isinstance(field, serializers.SerializerMethodField):
+            paths = _infer_method_field_paths(name, field, opts)
+        elif field.source == '*':
+            paths = None
+        else:
+            paths = [field.source]
+        if paths is None:
+            return None
+        for path in paths:
+            parts = path.replace('__', '.').split('.')
+            try:
+                model_field = opts.get_field(parts[0])
+            except FieldDoesNotExist:
+                # 模型属性或方法，依赖未知
+                return None
+            if model_field.concrete and not model_field.many_to_many:
+                columns.add(model_field.name)
+                if model_field.is_relation and (len(parts) > 1 or isinstance(field, serializers.BaseSerializer)):
+                    relations.add(model_field.name)
+            else:
+                relations.add(model_field.name)
+    return columns, relations
+
+
+def _ordering_columns(queryset):
+    """排序字段（游标分页需要读取）"""
+    query = queryset.query
+    ordering = query.order_by or (query.get_meta().ordering if query.default_ordering else ())
+    columns = set()
+    for item in ordering:
+        if not isinstance(item, str):
+            continue
+        name = item.lstrip('-').split('__')[0]
+        try:
+            field = queryset.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            continue
+        if field.concrete and not field.many_to_many:
+            columns.add(field.name)
+    return columns
+
+
+def _flatten_select_related(tree, prefix=''):
+    paths = []
+    for name, children in tree.items():
+        path = f'{prefix}{name}'
+        nested = _flatten_select_related(children, f'{path}__') if children else []
+        paths.extend(nested or [path])
+    return paths
+
+
+def apply_sparse_fieldset(queryset, serializer):
+    """
+    只查询输出字段依赖的列，并去掉不再需要的 select_related / prefetch_related
+    依赖无法确定时原样返回查询集
+    """
+    plan = get_sparse_plan(serializer, queryset.model)
+    if plan is None:
+        return queryset
+    columns, relations = plan
+
+    lookups = queryset._prefetch_related_lookups
+    kept_lookups = [
+        lookup for lookup in lookups
+        if (lookup.prefetch_through if isinstance(lookup, Prefetch) else lookup).split('__')[0] in relations
+    ]
+    if len(kept_lookups) != len(lookups):
+        queryset = queryset.prefetch_related(None).prefetch_related(*kept_lookups)
+
+    select_related = queryset.query.select_related
+    if select_related is True:
+        # select_related() 未指定字段时无法与 only() 同时使用
+        return queryset
+    if isinstance(select_related, dict):
+        kept = {name: children for name, children in select_related.items() if name in relations}
+        if kept != select_related:
+            queryset = queryset.select_related(None)
+            if kept:
+                queryset = queryset.select_related(*_flatten_select_related(kept))
+        columns.update(kept)
+
+    columns |= _ordering_columns(queryset)
+    return queryset.only(*(columns or [queryset.model._meta.pk.name]))
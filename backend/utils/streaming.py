@@ -0,0 +1,57 @@
+"""
+@Remark: 流式响应工具，按批次迭代查询集并逐块输出，内存占用只与批次大小相关
+"""
+from django.http import StreamingHttpResponse
+
+from utils.renderers import dumps as orjson_dumps
+
+# 默认每批处理的行数
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def iter_chunks(queryset, chunk_size=DEFAULT_CHUNK_SIZE):
+    """以 iterator(chunk_size) 迭代查询集，按批次产出实例列表"""
+    batch = []
+    for obj in queryset.iterator(chunk_size=chunk_size):
+        batch.append(obj)
+        if len(batch) >= chunk_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def iter_serialized_chunks(queryset, serialize, chunk_size=DEFAULT_CHUNK_SIZE):
+    """按批次序列化，serialize 接收实例列表并返回字典列表"""
+    for batch in iter_chunks(queryset, chunk_size):
+        yield serialize(batch)
+
+
+def dumps(data):
+    return orjson_dumps(data).decode()
+
+
+def iter_json_envelope(rows_chunks, code=0, message='ok'):
+    """以标准响应结构 {code, message, data: [...]} 逐块输出 JSON 数组"""
+    yield dumps({'code': code, 'message': message})[:-1] + ',"data":['
+    first = True
+    for rows in rows_chunks:
+        if not rows:
+            continue
+        body = ','.join(dumps(row) for row in rows)
+        yield body if first else ',' + body
+        first = False
+    yield ']}'
+
+
+def iter_ndjson(rows_chunks):
+    """每行一条记录的 NDJSON"""
+    for rows in rows_chunks:
+        if rows:
+            yield ''.join(dumps(row) + '\n' for row in rows)
+
+
+def streaming_json_response(rows_chunks, stream_format='json'):
+    if stream_format == 'ndjson':
+        return StreamingHttpResponse(iter_ndjson(rows_chunks), content_type='application/x-ndjson')
+    return StreamingHttpResponse(iter_json_envelope(rows_chunks), content_type='application/json')
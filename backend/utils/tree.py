@@ -0,0 +1,32 @@
+"""
+@Remark: 树形结构工具，一次查询加载全部节点后在内存中组装
+"""
+from collections import defaultdict
+
+# 子节点列表挂载的属性名
+TREE_CHILDREN_ATTR = '_tree_children'
+
+
+def build_tree_index(nodes, parent_field='pid'):
+    """
+    为一次性加载的节点建立 父->子 索引
+    - 子节点按原列表顺序挂到 node._tree_children 上
+    - 回填父节点外键缓存，访问 node.pid 不再触发查询
+    返回 {pk: node}
+    """
+    parent_attname = f'{parent_field}_id'
+    index = {node.pk: node for node in nodes}
+    children_map = defaultdict(list)
+    for node in nodes:
+        parent_id = getattr(node, parent_attname)
+        if parent_id is not None and parent_id in index:
+            setattr(node, parent_field, index[parent_id])
+            children_map[parent_id].append(node)
+    for node in nodes:
+        setattr(node, TREE_CHILDREN_ATTR, children_map.get(node.pk, []))
+    return index
+
+
+def get_tree_children(node):
+    """读取内存中组装好的子节点，未组装时返回 None"""
+    return getattr(node, TREE_CHILDREN_ATTR, None)
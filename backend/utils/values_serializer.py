@@ -0,0 +1,157 @@
+"""
+@Remark: 基于 .values() 的只读快速序列化，把序列化器的输出字段编译成查询投影与逐列转换
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import CharField as ModelCharField, TextField as ModelTextField
+from django.utils.encoding import force_str
+from rest_framework import ISO_8601, serializers
+from rest_framework.fields import empty
+from rest_framework.settings import api_settings
+
+from utils.sparse_fields import is_choice_display_method
+
+# DB 返回值即为输出值的字段类型
+IDENTITY_FIELDS = (serializers.IntegerField, serializers.BooleanField, serializers.PrimaryKeyRelatedField)
+# 外键为空时跳过该输出键（与 DRF 对只读点号 source 的处理一致）
+_SKIP = object()
+
+
+class ValuesPlan:
+    """
+    编译后的序列化计划
+    lookups 为 .values() 的查询列；serialize(rows) 把 values 行转换成与原序列化器一致的输出
+    """
+
+    def __init__(self, lookups, columns):
+        self.lookups = lookups
+        self.columns = columns
+
+    def serialize(self, rows):
+        columns = self.columns
+        data = []
+        for row in rows:
+            item = {}
+            for name, lookup, transform, guard, on_null in columns:
+                if guard is not None and row[guard] is None:
+                    if on_null is not _SKIP:
+                        item[name] = on_null
+                    continue
+                value = row[lookup]
+                item[name] = value if value is None or transform is None else transform(value)
+            data.append(item)
+        return data
+
+
+def _resolve_source(model, source_attrs):
+    """
+    把 source 解析为 values 查询路径，只允许正向外键链路 + 末端普通字段
+    返回 (lookup, 末端模型字段, 首段外键字段名或 None)，无法解析时返回 None
+    """
+    opts = model._meta
+    fields = []
+    for index, attr in enumerate(source_attrs):
+        try:
+            field = opts.get_field(attr)
+        except FieldDoesNotExist:
+            return None
+        if not field.concrete or field.many_to_many:
+            return None
+        fields.append(field)
+        if index < len(source_attrs) - 1:
+            if not field.is_relation:
+                return None
+            opts = field.related_model._meta
+    guard = fields[0].name if len(fields) > 1 else None
+    return '__'.join(source_attrs), fields[-1], guard
+
+
+def _choice_display(model_field):
+    choices = dict(model_field.flatchoices)
+
+    def display(value):
+        return force_str(choices.get(value, value), strings_only=True)
+    return display
+
+
+def _datetime_formatter(field):
+    """预先解析输出格式与时区，避免逐值读取当前时区"""
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    if output_format is None or output_format.lower() == ISO_8601:
+        return field.to_representation
+    tz = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+
+    def to_representation(value):
+        if isinstance(value, str) or tz is None or value.tzinfo is None:
+            return field.to_representation(value)
+        return value.astimezone(tz).strftime(output_format)
+    return to_representation
+
+
+def _compile_field(name, field, model):
+    """编译单个输出字段，返回 (lookup, transform, guard, on_null)，不支持时返回 None"""
+    if isinstance(field, serializers.SerializerMethodField):
+        # DesensitizationMixin 的脱敏字段：按原字段路径取值后整列脱敏
+        get_transform = getattr(field.parent, 'get_desensitize_value_transform', None)
+        desensitize = get_transform(name) if get_transform is not None else None
+        if desensitize is not None:
+            source, transform = desensitize
+            resolved = _resolve_source(model, source.split('.'))
+            if resolved is None:
+                return None
+            return resolved[0], transform, None, None
+        # 约定 xxx_text 为 xxx 字段的 choices 显示值，方法体须为标准的 get_xxx_display 调用
+        if not name.endswith('_text'):
+            return None
+        resolved = _resolve_source(model, [name[:-len('_text')]])
+        if resolved is None or not resolved[1].choices or not is_choice_display_method(field, resolved[1].name):
+            return None
+        return resolved[0], _choice_display(resolved[1]), None, None
+    if isinstance(field, (serializers.BaseSerializer, serializers.ManyRelatedField)) or field.source == '*':
+        return None
+    if isinstance(field, serializers.RelatedField) and not isinstance(field, serializers.PrimaryKeyRelatedField):
+        return None
+    resolved = _resolve_source(model, field.source_attrs)
+    if resolved is None:
+        return None
+    lookup, model_field, guard = resolved
+    if isinstance(field, serializers.PrimaryKeyRelatedField):
+        if guard is not None or not model_field.is_relation or field.pk_field is not None:
+            return None
+    elif model_field.is_relation:
+        return None
+    if isinstance(field, IDENTITY_FIELDS) or (
+        type(field) is serializers.CharField and isinstance(model_field, (ModelCharField, ModelTextField))
+    ):
+        transform = None
+    elif type(field) is serializers.DateTimeField:
+        transform = _datetime_formatter(field)
+    else:
+        transform = field.to_representation
+    on_null = None
+    if guard is not None:
+        if field.default is not empty:
+            on_null = field.get_default()
+        elif not field.allow_null:
+            on_null = _SKIP
+    return lookup, transform, guard, on_null
+
+
+def compile_values_plan(serializer, model):
+    """
+    编译列表序列化器（ListSerializer 的 child）的输出字段
+    覆盖普通字段、choices 显示（xxx_text）、日期时间格式化、正向外键 source='a.b'、脱敏字段；
+    存在无法编译的字段时返回 None，调用方回退到常规序列化器
+    """
+    lookups, columns = [], []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        compiled = _compile_field(name, field, model)
+        if compiled is None:
+            return None
+        lookup, transform, guard, on_null = compiled
+        lookups.append(lookup)
+        if guard is not None:
+            lookups.append(guard)
+        columns.append((name, lookup, transform, guard, on_null))
+    return ValuesPlan(list(dict.fromkeys(lookups)), columns)